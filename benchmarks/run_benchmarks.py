@@ -0,0 +1,203 @@
+"""Times the workloads under the runtime and natively.
+
+Run in this directory:
+
+    python run_benchmarks.py [names] [--baseline baseline.json]
+                             [--threshold 0.25] [--save baseline.json]
+
+The slowdown ratio of each workload, the time under the runtime divided
+by the native time, is compared with the baseline, and the exit status
+is 1 when one of them is larger than the threshold allows.
+"""
+import argparse
+from contextlib import redirect_stdout
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import types
+
+sys.path.append("../src")
+
+from calciumpy.runtime import Runtime, RuntimeResult
+from calciumpy.tool.converter import convert_to_code
+
+WORKLOADS_DIR = "workloads"
+
+# the inputs given to input() in order
+INPUTS = {
+    "interactive": ["2000"] + [str(i) for i in range(2000)],
+}
+
+
+def long_program(count: int = 1500) -> str:
+    """Returns a program of thousands of lines without loops."""
+    lines = ["total = 0"]
+    for i in range(count):
+        lines.append(f"v{i} = {i} * 3 + total % 7")
+        lines.append(f"if v{i} % 2 == 0:")
+        lines.append(f"    total += v{i}")
+        lines.append("else:")
+        lines.append("    total -= 1")
+    lines.append("print(total)")
+    return "\n".join(lines) + "\n"
+
+
+def load_workloads() -> dict[str, str]:
+    workloads = {}
+    for filename in sorted(os.listdir(WORKLOADS_DIR)):
+        if filename.endswith(".py"):
+            with open(os.path.join(WORKLOADS_DIR, filename)) as fin:
+                workloads[filename[:-3]] = fin.read()
+    workloads["long_program"] = long_program()
+    return workloads
+
+
+def run_native(code: types.CodeType, inputs: list[str]) -> str:
+    feed = iter(inputs)
+    globals_dict = {
+        "__name__": "__main__",
+        "input": lambda prompt="": next(feed),
+    }
+    with io.StringIO() as out:
+        with redirect_stdout(out):
+            exec(code, globals_dict)
+        return out.getvalue()
+
+
+def run_calcium(runtime: Runtime, inputs: list[str]) -> str:
+    feed = iter(inputs)
+    with io.StringIO() as out:
+        with redirect_stdout(out):
+            result = runtime.run()
+            while result is RuntimeResult.PAUSED:
+                result = runtime.resume(next(feed))
+                if result is RuntimeResult.EXECUTED:
+                    result = runtime.run()
+        return out.getvalue()
+
+
+def best_time(func, repeat: int, setup=lambda: None) -> float:
+    """Returns the shortest time of func called with the result of
+    setup, which is not timed."""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(name: str, source: str, repeat: int) -> dict:
+    inputs = INPUTS.get(name, [])
+    start = time.perf_counter()
+    code = convert_to_code(source)
+    convert_time = time.perf_counter() - start
+
+    native_code = compile(source, name, "exec")
+    expected = run_native(native_code, inputs)
+    runtime = Runtime(code)
+    output = run_calcium(runtime, inputs)
+    if output != expected:
+        raise AssertionError(f"{name} printed {output!r}, not {expected!r}")
+    steps = runtime.stats()["steps"]
+
+    # compiling and parsing the code are timed apart from running it
+    native_setup = best_time(lambda _: compile(source, name, "exec"), repeat)
+    calcium_setup = best_time(lambda _: Runtime(code), repeat)
+    native = best_time(lambda _: run_native(native_code, inputs), repeat)
+    calcium = best_time(
+        lambda runtime: run_calcium(runtime, inputs),
+        repeat,
+        lambda: Runtime(code),
+    )
+    return {
+        "convert": convert_time,
+        "setup": {"native": native_setup, "calcium": calcium_setup},
+        "native": native,
+        "calcium": calcium,
+        "slowdown": calcium / native,
+        "steps": steps,
+        "steps_per_second": steps / calcium,
+        # including the memory of the compiled and the parsed code
+        "peak_memory": {
+            "native": peak_memory(
+                lambda: run_native(compile(source, name, "exec"), inputs)
+            ),
+            "calcium": peak_memory(lambda: run_calcium(Runtime(code), inputs)),
+        },
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns the workloads slower than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("workloads", {}).get(name)
+        if base is None:
+            continue
+        limit = base["slowdown"] * (1 + threshold)
+        if result["slowdown"] > limit:
+            regressions.append(
+                f"{name}: slowdown {result['slowdown']:.1f}"
+                f" > {limit:.1f} (baseline {base['slowdown']:.1f})"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="the workloads to run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default="baseline.json")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="the allowed growth of the slowdown ratios",
+    )
+    parser.add_argument("--save", help="writes the results as a baseline")
+    args = parser.parse_args(argv)
+
+    workloads = load_workloads()
+    names = args.names or list(workloads)
+    results = {
+        name: measure(name, workloads[name], args.repeat) for name in names
+    }
+    report = {
+        "python": platform.python_version(),
+        "workloads": results,
+    }
+    json.dump(report, sys.stdout, indent=1)
+    print()
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=1)
+            f.write("\n")
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(regression, file=sys.stderr)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
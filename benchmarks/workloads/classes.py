@@ -0,0 +1,40 @@
+class Shape:
+    def __init__(self, name):
+        self.name = name
+
+    def area(self):
+        return 0
+
+    def describe(self):
+        return self.name + " " + str(self.area())
+
+
+class Rect(Shape):
+    def __init__(self, width, height):
+        Shape.__init__(self, "rect")
+        self.width = width
+        self.height = height
+
+    def area(self):
+        return self.width * self.height
+
+
+class Square(Rect):
+    def __init__(self, side):
+        Rect.__init__(self, side, side)
+        self.name = "square"
+
+
+shapes = []
+for i in range(1500):
+    if i % 2 == 0:
+        shapes.append(Rect(i, 2))
+    else:
+        shapes.append(Square(i))
+total = 0
+for shape in shapes:
+    total += shape.area()
+print(total)
+first = shapes[0]
+last = shapes[1]
+print(first.describe(), last.describe())
@@ -0,0 +1,9 @@
+words = ["apple", "banana", "cherry", "date", "elder", "fig", "grape"]
+n = len(words)
+counts = {}
+for i in range(6000):
+    j = (i * 7 + i // 3) % n
+    word = words[j]
+    counts[word] = counts.get(word, 0) + 1
+for word in sorted(counts):
+    print(word, counts[word])
@@ -0,0 +1,7 @@
+n = int(input("how many? "))
+total = 0
+for i in range(n):
+    value = int(input())
+    if value % 3 == 0:
+        total += value
+print(total)
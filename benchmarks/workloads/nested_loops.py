@@ -0,0 +1,9 @@
+total = 0
+for i in range(60):
+    for j in range(60):
+        for k in range(20):
+            if (i + j + k) % 7 == 0:
+                total += i * j
+            else:
+                total -= k
+print(total)
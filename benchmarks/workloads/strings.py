@@ -0,0 +1,13 @@
+text = ""
+for i in range(3000):
+    text += str(i % 10)
+    if i % 50 == 49:
+        text += "\n"
+lines = text.split("\n")
+words = []
+for line in lines:
+    upper = line.upper()
+    words.append(upper.replace("0", "o"))
+print(len(text), len(lines))
+joined = "-".join(words)
+print(joined[:40])
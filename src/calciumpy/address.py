@@ -1,4 +1,6 @@
 class Address:
+    __slots__ = ("indent", "line", "calls")
+
     def __init__(self, indent: int, line: int, calls=0):
         self.indent = indent
         self.line = line
@@ -0,0 +1,283 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import typing
+
+from .error import BudgetExceededError
+from .runtime import Runtime, RuntimeResult
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore
+
+
+class Job:
+    """A Calcium program with the inputs given to input() in order."""
+
+    __slots__ = ("code", "inputs")
+
+    def __init__(
+        self, code: typing.Union[str, list], inputs: typing.Sequence[str] = ()
+    ):
+        if not isinstance(code, str):
+            # sent to the worker as one string
+            code = json.dumps(code)
+        self.code = code
+        self.inputs = list(inputs)
+
+
+class JobResult:
+    """The result of the job at `index` of the batch.
+
+    `error` is the name and the message of the exception which
+    stopped the program, or None. `result` is PAUSED when the program
+    called input() after all the inputs were used, and
+    BUDGET_EXHAUSTED when it hit the step or CPU time limit. The output
+    is lost when the worker had to be killed for the time limit.
+    """
+
+    __slots__ = ("index", "result", "output", "error")
+
+    def __init__(
+        self,
+        index: int,
+        result: RuntimeResult,
+        output: str,
+        error: typing.Optional[str] = None,
+    ):
+        self.index = index
+        self.result = result
+        self.output = output
+        self.error = error
+
+
+class _Limits:
+    __slots__ = ("max_steps", "cpu_time", "memory", "jobs", "max_rss")
+
+    def __init__(self, max_steps, cpu_time, memory, jobs, max_rss):
+        self.max_steps = max_steps
+        self.cpu_time = cpu_time
+        self.memory = memory
+        self.jobs = jobs
+        self.max_rss = max_rss
+
+
+class BatchExecutor:
+    """Runs many Calcium programs on a pool of worker processes.
+
+    The workers are started on the first batch and kept for the next
+    ones until close() is called. They import calciumpy once and run
+    one job after another.
+    Each job is limited by `max_steps` steps and `cpu_time` seconds of
+    CPU time, and `memory` bytes bounds the address space of a worker.
+    A worker which has not stopped the job within twice its CPU time
+    and one more second, as in a long call of library code, is killed.
+    A worker is replaced after `jobs_per_worker` jobs, when its peak
+    RSS exceeds `max_rss` bytes, or when a job runs out of memory.
+    """
+
+    def __init__(
+        self,
+        workers: typing.Optional[int] = None,
+        max_steps: typing.Optional[int] = None,
+        cpu_time: typing.Optional[float] = None,
+        memory: typing.Optional[int] = None,
+        jobs_per_worker: int = 100,
+        max_rss: typing.Optional[int] = None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.limits = _Limits(
+            max_steps, cpu_time, memory, jobs_per_worker, max_rss
+        )
+        self._context = multiprocessing.get_context()
+        # the workers waiting for jobs between the batches
+        self._idle: list[_Worker] = []
+
+    def __enter__(self) -> "BatchExecutor":
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the workers."""
+        idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+    def run(self, jobs: typing.Iterable[Job]) -> typing.Iterator[JobResult]:
+        """Yields the results in the order the jobs are finished."""
+        pending = enumerate(jobs)
+        # the index of the job run by each worker and when it was sent
+        running: dict[_Worker, tuple[int, float]] = {}
+        # the workers exited by themselves are replaced
+        idle = [w for w in self._idle if w.process.is_alive()]
+        for worker in self._idle:
+            if worker not in idle:
+                worker.close()
+        while len(idle) < self.workers:
+            idle.append(self._spawn())
+        self._idle = []
+        kill_after = None
+        if self.limits.cpu_time is not None:
+            kill_after = 2 * self.limits.cpu_time + 1
+        try:
+            while True:
+                while len(idle) > 0:
+                    item = next(pending, None)
+                    if item is None:
+                        break
+                    worker = idle.pop()
+                    index, job = item
+                    worker.conn.send((job.code, job.inputs))
+                    running[worker] = (index, time.monotonic())
+                if len(running) == 0:
+                    return
+                timeout = None
+                if kill_after is not None:
+                    first = min(sent for _, sent in running.values())
+                    timeout = max(0, first + kill_after - time.monotonic())
+                conns = {worker.conn: worker for worker in running}
+                ready = multiprocessing.connection.wait(list(conns), timeout)
+                for conn in ready:
+                    worker = conns[conn]
+                    index, _ = running.pop(worker)
+                    try:
+                        name, output, error, retires = conn.recv()
+                        result = RuntimeResult[name]
+                    except (EOFError, OSError):
+                        # killed by the system or by a limit
+                        result = RuntimeResult.EXCEPTION
+                        output, error, retires = "", "worker exited", True
+                    if retires:
+                        worker.close()
+                        worker = self._spawn()
+                    idle.append(worker)
+                    yield JobResult(index, result, output, error)
+                if kill_after is None:
+                    continue
+                now = time.monotonic()
+                for worker, (index, sent) in list(running.items()):
+                    if now - sent >= kill_after:
+                        # the worker is stuck in a step
+                        del running[worker]
+                        worker.kill()
+                        idle.append(self._spawn())
+                        yield JobResult(
+                            index, RuntimeResult.BUDGET_EXHAUSTED, ""
+                        )
+        finally:
+            # the workers still running jobs of an abandoned batch
+            # would send their results to the next one
+            for worker in running:
+                worker.kill()
+            self._idle = idle
+
+    def map(self, jobs: typing.Iterable[Job]) -> list[JobResult]:
+        """Returns the results in the order of the jobs."""
+        return sorted(self.run(jobs), key=lambda result: result.index)
+
+    def _spawn(self) -> "_Worker":
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_work, args=(child_conn, self.limits), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, conn)
+
+
+class _Worker:
+    __slots__ = ("process", "conn")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+    def close(self) -> None:
+        try:
+            # the forked workers may hold the other end of the pipe,
+            # so the worker is told to stop instead of seeing EOF
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def _work(conn, limits: _Limits) -> None:
+    if resource is not None and limits.memory is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (limits.memory, limits.memory))
+    for count in range(1, limits.jobs + 1):
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        code, inputs = job
+        out = io.StringIO()
+        error = None
+        try:
+            with contextlib.redirect_stdout(out):
+                result = _run_job(code, inputs, limits)
+        except MemoryError:
+            result, error = RuntimeResult.EXCEPTION, "MemoryError"
+        except Exception as e:
+            result = RuntimeResult.EXCEPTION
+            error = f"{type(e).__name__}: {e}"
+        retires = count == limits.jobs or error == "MemoryError"
+        if resource is not None and limits.max_rss is not None:
+            # ru_maxrss is in kilobytes on Linux
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            retires = retires or rss > limits.max_rss
+        conn.send((result.name, out.getvalue(), error, retires))
+        if retires:
+            return
+
+
+def _run_job(code: str, inputs: list[str], limits: _Limits) -> RuntimeResult:
+    runtime = Runtime(code)
+    counters = runtime.env.counters
+    inputs.reverse()
+    cpu_deadline = None
+    if limits.cpu_time is not None:
+        cpu_deadline = time.process_time() + limits.cpu_time
+    while True:
+        max_steps = None
+        if limits.max_steps is not None:
+            max_steps = limits.max_steps - counters.steps
+        deadline = None
+        if cpu_deadline is not None:
+            # the CPU time cannot pass faster than the clock, so the
+            # deadline is not later than the CPU time limit
+            deadline = time.monotonic() + cpu_deadline - time.process_time()
+        try:
+            result = runtime.run_for(max_steps, deadline)
+        except BudgetExceededError:
+            # in a function called by library code
+            return RuntimeResult.BUDGET_EXHAUSTED
+        while result is RuntimeResult.PAUSED and len(inputs) > 0:
+            result = runtime.resume(inputs.pop())
+        if result is RuntimeResult.BUDGET_EXHAUSTED:
+            steps = counters.steps
+            if max_steps is not None and steps >= limits.max_steps:
+                return result
+            if cpu_deadline is not None:
+                if time.process_time() >= cpu_deadline:
+                    return result
+        elif result is not RuntimeResult.EXECUTED:
+            return result
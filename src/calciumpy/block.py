@@ -1,5 +1,5 @@
+import abc
 import enum
-import typing
 from .address import Address
 from .block_result import BlockResult
 from .environment import Environment
@@ -17,24 +17,36 @@ class BlockKind(enum.Enum):
     CLASS = 5
 
 
-class Block:
-    def __init__(
-        self,
-        kind: BlockKind,
-        addr: Address,
-        enter: typing.Callable[[Environment], bool],
-        exit: typing.Callable[[Environment], BlockResult],
-    ):
+class Block(abc.ABC):
+    """A block entered by a command.
+
+    The subclasses define what is done when the block is entered and
+    exited, so a block holds no closure and can be pickled.
+    """
+
+    __slots__ = ("kind", "addr")
+
+    def __init__(self, kind: BlockKind, addr: Address):
         self.kind = kind
         self.addr = addr.clone()
-        self.enter = enter
-        self.exit = exit
+
+    def enter(self, env: Environment) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def exit(self, env: Environment) -> BlockResult:
+        pass
 
     def will_enter(self, env: Environment):
-        env.addr = self.addr.clone()
+        env.addr.jump(self.addr)
         if self.enter(env):
             env.addr.shift(1)
-            env.blocks.append(self)
+            blocks = env.blocks
+            blocks.append(self)
+            counters = env.counters
+            counters.blocks_pushed += 1
+            if len(blocks) > counters.max_block_depth:
+                counters.max_block_depth = len(blocks)
 
     def did_exit(self, env: Environment) -> BlockResult:
         env.blocks.pop()
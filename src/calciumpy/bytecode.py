@@ -0,0 +1,144 @@
+import hashlib
+import marshal
+import os
+import tempfile
+import zlib
+
+from .element import Element, is_command, read_num
+from .index import Index
+from .keyword import Keyword
+
+# the first bytes of the bytecode, followed by the version
+MAGIC = b"Ca\x00"
+VERSION = 1
+
+_HEADER = MAGIC + bytes([VERSION, marshal.version])
+
+
+def encode(code: list[list[Element]]) -> bytes:
+    """Encodes the Calcium code in a binary form which is loaded
+    without parsing JSON.
+
+    The numbers are decoded from their strings beforehand, and the
+    nested lists are marshaled and compressed, which shrinks the
+    repeated keywords and names.
+    """
+    body = marshal.dumps(_Encoder().encode(code))
+    return _HEADER + zlib.compress(body)
+
+
+def decode(data: bytes) -> list[list[Element]]:
+    if not is_bytecode(data):
+        raise ValueError("not Calcium bytecode of this version")
+    return marshal.loads(zlib.decompress(data[len(_HEADER) :]))
+
+
+def is_bytecode(data: bytes) -> bool:
+    return data[: len(_HEADER)] == _HEADER
+
+
+# the commands whose elements after the keyword are not expressions
+_NAMED = (
+    Keyword.DEF.value,
+    Keyword.CLASS.value,
+    Keyword.IMPORT.value,
+    Keyword.COMMENT.value,
+)
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+
+    def encode(self, code: list[list[Element]]) -> list[list[Element]]:
+        return [self.command(line) for line in code]
+
+    def command(self, line: list[Element]) -> list[Element]:
+        if not is_command(line):
+            return self.intern(line)  # type: ignore
+        head = self.intern(line[: Index.KEYWORD + 1])
+        kwd = line[Index.KEYWORD]
+        rest = line[Index.KEYWORD + 1 :]
+        if kwd == Keyword.CLASS.value and len(rest) > 1:
+            # the superclass is an expression
+            return head + [self.intern(rest[0]), self.expr(rest[1])]
+        if kwd in _NAMED:
+            return head + self.intern(rest)  # type: ignore
+        return head + [self.expr(elem) for elem in rest]
+
+    def expr(self, obj: Element) -> Element:
+        # the numbers can only be found where expressions are
+        if not isinstance(obj, list) or len(obj) == 0:
+            return self.intern(obj)
+        kwd = obj[Index.EXPRESSION_KEYWORD]
+        if kwd == Keyword.NUM.value:
+            return [self.intern(kwd), read_num(obj[Index.NUM_VALUE])]
+        if kwd == Keyword.CALL.value:
+            args: list[Element] = obj[Index.CALL_ARGS]  # type: ignore
+            return [
+                self.intern(kwd),
+                self.expr(obj[Index.CALL_CALLEE]),
+                [self.expr(arg) for arg in args],
+            ]
+        if kwd == Keyword.LIST.value:
+            elems: list[Element] = obj[1]  # type: ignore
+            return [self.intern(kwd), [self.expr(e) for e in elems]]
+        if kwd == Keyword.DICT.value:
+            items: list[list[Element]] = obj[1]  # type: ignore
+            pairs = [[self.expr(k), self.expr(v)] for k, v in items]
+            return [self.intern(kwd), pairs]
+        if kwd == Keyword.ATTRIBUTE.value:
+            target = self.expr(obj[Index.ATTR_OBJECT])
+            names: list[Element] = self.intern(obj[Index.ATTR_NAME :])  # type: ignore
+            return [self.intern(kwd), target] + names
+        if kwd in (Keyword.VARIABLE.value, Keyword.KWARG.value):
+            # the name is not an expression
+            head: list[Element] = self.intern(obj[:2])  # type: ignore
+            return head + [self.expr(e) for e in obj[2:]]
+        return [self.intern(kwd)] + [self.expr(e) for e in obj[1:]]
+
+    def intern(self, obj: Element) -> Element:
+        if isinstance(obj, str):
+            return self.strings.setdefault(obj, obj)
+        if isinstance(obj, list):
+            return [self.intern(elem) for elem in obj]
+        return obj
+
+
+class ConversionCache:
+    """The bytecode of Python sources converted to Calcium,
+    stored in a directory like __pycache__.
+
+    The files are named after the hash of the source and the version
+    of the converter, so a source is converted only once.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def load(self, source: str) -> bytes:
+        path = self.path(source)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if is_bytecode(data):
+                return data
+        except FileNotFoundError:
+            pass
+        from .tool.converter import convert_to_code
+
+        data = encode(convert_to_code(source))
+        os.makedirs(self.directory, exist_ok=True)
+        # written to another file first not to be read half-written
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return data
+
+    def path(self, source: str) -> str:
+        from .tool.converter import VERSION as CONVERTER_VERSION
+
+        key = f"{CONVERTER_VERSION}\n{source}"
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.calc")
@@ -1,18 +1,18 @@
 import typing
-from ..expression.assignable import Assignable
+from ..expression.assignable import Assignable, compile_target
+from ..expression.compiler import compile_expression
 from .command import Command
 from ..environment import Environment
 
 
 class Assign(Command):
+    __slots__ = ("lhs", "rhs", "_assign", "_evaluate")
+
     def __init__(self, lhs: typing.Union[Assignable, tuple], rhs: typing.Any):
         self.lhs = lhs
         self.rhs = rhs
+        self._assign = compile_target(lhs)
+        self._evaluate = compile_expression(rhs)
 
     def execute(self, env: Environment):
-        value = env.evaluate(self.rhs)
-        if not isinstance(self.lhs, tuple):
-            self.lhs.assign(value, env)
-            return
-        for lhs, val in zip(self.lhs, value):  # type: ignore
-            lhs.assign(val, env)
+        self._assign(env, self._evaluate(env))
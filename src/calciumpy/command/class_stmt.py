@@ -4,36 +4,45 @@ from ..block import Block, BlockKind
 from ..block_result import BlockResult
 from ..environment import Environment
 from ..expression.assignable import Variable, Attribute
+from ..expression.compiler import compile_expression
 from ..namespace import ClassScope
 
 
 class Class(Command):
+    __slots__ = ("name", "superclass", "_evaluate_superclass")
+
     def __init__(self, name: str, superclass: typing.Union[Variable, Attribute, None]):
         self.name = name
         self.superclass = superclass
+        self._evaluate_superclass = compile_expression(superclass)
 
     def execute(self, env: Environment) -> None:
-        if self.superclass is None:
+        superclass = self._evaluate_superclass(env)
+        if superclass is None:
             superclass = object
-        else:
-            superclass = self.superclass.evaluate(env)
-
-        def enter(env: Environment) -> bool:
-            parent_scope = env.context.find_nesting_scope()
-            env.context = ClassScope(parent_scope, {})
-            return True
-
-        previous_context = env.context
-
-        def exit(env: Environment) -> BlockResult:
-            if not isinstance(env.context, ClassScope):
-                raise RuntimeError("context is not ClassScope")
-            attributes = env.context.create_attributes()
-            env.context = previous_context
-            classtype = type(self.name, (superclass,), attributes)
-            env.context.define(self.name, classtype)
-            env.addr.shift(-1)
-            return BlockResult.SHIFT
-
-        block = Block(BlockKind.CLASS, env.addr, enter, exit)
-        block.will_enter(env)
+        ClassBlock(env, self.name, superclass).will_enter(env)
+
+
+class ClassBlock(Block):
+    __slots__ = ("name", "superclass", "previous_context")
+
+    def __init__(self, env: Environment, name: str, superclass: type):
+        super().__init__(BlockKind.CLASS, env.addr)
+        self.name = name
+        self.superclass = superclass
+        self.previous_context = env.context
+
+    def enter(self, env: Environment) -> bool:
+        parent_scope = env.context.find_nesting_scope()
+        env.context = ClassScope(parent_scope, {})
+        return True
+
+    def exit(self, env: Environment) -> BlockResult:
+        if not isinstance(env.context, ClassScope):
+            raise RuntimeError("context is not ClassScope")
+        attributes = env.context.create_attributes()
+        env.context = self.previous_context
+        classtype = type(self.name, (self.superclass,), attributes)
+        env.context.define(self.name, classtype)
+        env.addr.shift(-1)
+        return BlockResult.SHIFT
@@ -4,6 +4,8 @@ from ..environment import Environment
 
 
 class Command(abc.ABC):
+    __slots__ = ()
+
     @abc.abstractmethod
     def execute(self, env: Environment) -> None:
         pass
@@ -1,11 +1,15 @@
 import typing
 from .command import Command
 from ..environment import Environment
+from ..expression.compiler import compile_expression
 
 
 class ExprStmt(Command):
+    __slots__ = ("expr", "_evaluate")
+
     def __init__(self, expr: typing.Any):
         self.expr = expr
+        self._evaluate = compile_expression(expr)
 
     def execute(self, env: Environment) -> None:
-        env.evaluate(self.expr)
+        self._evaluate(env)
@@ -1,86 +1,167 @@
+from types import MethodType
 import typing
+from ..address import Address
 from ..block import Block, BlockKind
 from ..block_result import BlockResult
 from .command import Command
 from ..environment import Environment
-from ..error import InvalidReturnError
-from ..label import FunctionCalled
-from ..namespace import ClassScope, FuncScope
+from ..error import CallDepthExceededError, InvalidReturnError
+from ..executor import run_until_exited
+from ..expression.compiler import compile_expression
+from ..namespace import UNBOUND, ClassScope, FuncScope
 
 
 class Def(Command):
-    def __init__(self, name: str, params: list[str]):
+    __slots__ = ("name", "params", "layout")
+
+    def __init__(
+        self,
+        name: str,
+        params: list[str],
+        layout: typing.Optional[dict[str, int]] = None,
+    ):
         self.name = name
         self.params = params
+        if layout is None:
+            layout = {param: i for i, param in enumerate(params)}
+        # the parameters come first in the slots of the local variables
+        self.layout = layout
 
     def execute(self, env: Environment) -> None:
-        defined_addr = env.addr.clone()
-        nesting_scope = env.context.find_nesting_scope()
-        is_classscope = isinstance(env.context, ClassScope)
-        is_init = self.name == "__init__" and is_classscope
-
-        def _func(*args, is_called_by_library=True):
-            # could be called by standard library
-            caller_addr = env.addr.clone()
-            local = FuncScope(
-                nesting_scope,
-                {param_name: arg for param_name, arg in zip(self.params, args)},
-            )
-            callee_addr = defined_addr.clone()
-            callee_addr.calls = caller_addr.calls + 1
-
-            def enter(env: Environment) -> bool:
-                env.callstack.append(env.context)
-                env.context = local
-                return True
-
-            had_exited = False
-
-            def exit(env: Environment) -> BlockResult:
-                env.addr.jump(caller_addr)
-                env.addr.calls -= 1
-                env.addr.shift(0, -1)
-                if is_init:
-                    env.returned_value = env.context.lookup("self")
-                env.context = env.callstack.pop()
-                nonlocal had_exited
-                had_exited = True
-                return BlockResult.JUMP
-
-            block = Block(BlockKind.CALL, callee_addr, enter, exit)
-            block.will_enter(env)
-
-            if not is_called_by_library:
-                # controls the flow of the program
-                raise FunctionCalled()
-
-            from ..parser import Parser
-
-            parser = Parser()
-            while not had_exited:
-                env.update_addr_to_next_command()
-                last_index = len(env.code) - 1
-                if env.addr.indent == 0:
-                    break
-                if env.addr.line >= last_index:
-                    break
-                line = env.code[env.addr.line]
-                cmd = parser.read(line)
-                cmd.execute(env)
-            env.update_addr_to_next_command()
-            value = env.returned_value
-            env.returned_value = None
-            return value
-
-        env.context.define(self.name, _func)
+        is_init = self.name == "__init__" and isinstance(
+            env.context, ClassScope
+        )
+        func = UserFunction(self, env, is_init)
+        env.context.define(self.name, func)
+
+
+class UserFunction:
+    """A function defined by the code.
+
+    The interpreter calls it with `enter`, which makes the runtime
+    run its body, and library code calls it as a Python function.
+    """
+
+    __slots__ = (
+        "defn",
+        "env",
+        "nesting_scope",
+        "indent",
+        "line",
+        "is_init",
+        "__name__",
+    )
+
+    def __init__(self, defn: Def, env: Environment, is_init: bool):
+        self.defn = defn
+        self.env = env
+        self.nesting_scope = env.context.find_nesting_scope()
+        # where the function is defined
+        self.indent = env.addr.indent
+        self.line = env.addr.line
+        self.is_init = is_init
+        self.__name__ = defn.name
+
+    def __repr__(self) -> str:
+        return f"<function {self.__name__}>"
+
+    def __get__(self, obj: typing.Any, objtype: typing.Any = None):
+        # bound to the instance like a Python function
+        if obj is None:
+            return self
+        return MethodType(self, obj)
+
+    def enter(self, args: typing.Sequence[typing.Any]) -> "CallBlock":
+        """Enters the body of the function with the arguments."""
+        env = self.env
+        # the address is not changed until the callee returns
+        caller_addr = env.addr
+        if caller_addr.calls >= env.max_depth:
+            raise CallDepthExceededError(env.max_depth)
+        defn = self.defn
+        slots = [UNBOUND] * len(defn.layout)
+        for i, arg in zip(range(len(defn.params)), args):
+            slots[i] = arg
+        local = FuncScope(self.nesting_scope, {}, defn.layout, slots)
+        calls = caller_addr.calls + 1
+        callee_addr = Address(self.indent, self.line, calls)
+        counters = env.counters
+        counters.calls += 1
+        if calls > counters.max_call_depth:
+            counters.max_call_depth = calls
+        block = CallBlock(callee_addr, caller_addr, local, self.is_init)
+        block.will_enter(env)
+        if env.call_profiler is not None:
+            env.call_profiler.call(self)
+        return block
+
+    def __call__(self, *args: typing.Any) -> typing.Any:
+        # called by library code, so the body is run until it returns
+        env = self.env
+        env.counters.callbacks += 1
+        block = self.enter(args)
+        run_until_exited(env, block)
+        value = env.returned_value
+        env.returned_value = None
+        if self.is_init:
+            # type() requires __init__ to return None
+            return None
+        return value
+
+
+class CallBlock(Block):
+    """The block of a function call, entered only once."""
+
+    __slots__ = ("caller_addr", "local", "is_init", "exited")
+
+    def __init__(
+        self,
+        addr: Address,
+        caller_addr: Address,
+        local: FuncScope,
+        is_init: bool,
+    ):
+        self.kind = BlockKind.CALL
+        self.addr = addr
+        self.caller_addr = caller_addr
+        self.local = local
+        self.is_init = is_init
+        self.exited = False
+
+    def will_enter(self, env: Environment):
+        env.addr = self.addr
+        env.addr.shift(1)
+        blocks = env.blocks
+        blocks.append(self)
+        counters = env.counters
+        counters.blocks_pushed += 1
+        if len(blocks) > counters.max_block_depth:
+            counters.max_block_depth = len(blocks)
+        env.callstack.append(env.context)
+        env.context = self.local
+
+    def exit(self, env: Environment) -> BlockResult:
+        # the next command is the caller, which is executed again
+        env.addr = self.caller_addr
+        env.addr.shift(0, -1)
+        if self.is_init:
+            env.returned_value = self.local.lookup("self")
+        env.context = env.callstack.pop()
+        self.exited = True
+        if env.call_profiler is not None:
+            env.call_profiler.returned()
+        return BlockResult.JUMP
 
 
 class Return(Command):
+    __slots__ = ("expr", "_evaluate")
+
     def __init__(self, expr: typing.Any):
         self.expr = expr
+        self._evaluate = compile_expression(expr)
 
     def execute(self, env: Environment) -> None:
-        env.returned_value = env.evaluate(self.expr)
+        env.returned_value = self._evaluate(env)
         while True:
             block = env.blocks[-1]
             if block.kind == BlockKind.CALL:
@@ -3,47 +3,58 @@ from ..block import Block, BlockKind
 from ..block_result import BlockResult
 from .command import Command
 from ..environment import Environment
+from ..expression.compiler import compile_expression
 
 
 class Ifs(Command):
+    __slots__ = ()
+
     def execute(self, env: Environment):
-        def enter(env: Environment) -> bool:
-            return True
+        IfsBlock(BlockKind.IFS, env.addr).will_enter(env)
 
-        def exit(env: Environment) -> BlockResult:
-            env.addr.shift(-1)
-            return BlockResult.SHIFT
 
-        block = Block(BlockKind.IFS, env.addr, enter, exit)
-        block.will_enter(env)
+class IfsBlock(Block):
+    __slots__ = ()
 
+    def exit(self, env: Environment) -> BlockResult:
+        env.addr.shift(-1)
+        return BlockResult.SHIFT
 
-def _execute_conditional_block(env: Environment) -> None:
-    def enter(env: Environment) -> bool:
-        return True
 
-    def exit(env: Environment) -> BlockResult:
+class ConditionalBlock(Block):
+    """The block of if, elif or else whose condition is satisfied."""
+
+    __slots__ = ()
+
+    def exit(self, env: Environment) -> BlockResult:
+        # exits the ifs block as well
         env.addr.shift(-2)
         env.blocks.pop()
         return BlockResult.JUMP
 
-    block = Block(BlockKind.IF_ELIF_ELSE, env.addr, enter, exit)
-    block.will_enter(env)
+
+def _execute_conditional_block(env: Environment) -> None:
+    ConditionalBlock(BlockKind.IF_ELIF_ELSE, env.addr).will_enter(env)
 
 
 class If(Command):
+    __slots__ = ("condition", "_evaluate")
+
     def __init__(self, condition: typing.Any):
         self.condition = condition
+        self._evaluate = compile_expression(condition)
 
     def execute(self, env: Environment):
-        if env.evaluate(self.condition):
+        if self._evaluate(env):
             _execute_conditional_block(env)
 
 
 class Elif(If):
-    pass
+    __slots__ = ()
 
 
 class Else(Command):
+    __slots__ = ()
+
     def execute(self, env: Environment):
         _execute_conditional_block(env)
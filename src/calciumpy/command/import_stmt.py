@@ -5,6 +5,8 @@ import importlib
 
 
 class Import(Command):
+    __slots__ = ("path",)
+
     def __init__(self, path: str):
         self.path = path
 
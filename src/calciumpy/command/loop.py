@@ -1,3 +1,4 @@
+import abc
 import typing
 from ..block import Block, BlockKind
 from ..block_result import BlockResult
@@ -8,10 +9,13 @@ from ..error import (
     InvalidContinueError,
     ObjectNotIterableError,
 )
-from ..expression.assignable import Assignable
+from ..expression.assignable import Assignable, compile_target
+from ..expression.compiler import compile_expression
 
 
 class For(Command):
+    __slots__ = ("vars", "iterable", "_assign", "_evaluate")
+
     def __init__(
         self,
         vars: typing.Union[Assignable, tuple],
@@ -19,51 +23,142 @@ class For(Command):
     ):
         self.vars = vars
         self.iterable = iterable
+        self._assign = compile_target(vars)
+        self._evaluate = compile_expression(iterable)
 
     def execute(self, env: Environment) -> None:
         try:
-            value = env.evaluate(self.iterable)
-            iterator = iter(value)
+            value = self._evaluate(env)
+            if type(value) is range:
+                block: LoopBlock = RangeBlock(env, self, value)
+            else:
+                block = ForBlock(env, self, iter(value))
         except TypeError:
             raise ObjectNotIterableError(str(self.iterable))
-
-        def enter(env: Environment) -> bool:
-            try:
-                value = next(iterator)
-            except StopIteration:
-                return False
-            if isinstance(self.vars, tuple):
-                for var, val in zip(self.vars, value):
-                    var.assign(val, env)
-                return True
-            self.vars.assign(value, env)
-            return True
-
-        def exit(env: Environment) -> BlockResult:
-            block.will_enter(env)
-            return BlockResult.JUMP
-
-        block = Block(BlockKind.FOR, env.addr, enter, exit)
         block.will_enter(env)
 
 
 class While(Command):
+    __slots__ = ("condition", "_evaluate")
+
     def __init__(self, condition: typing.Any):
         self.condition = condition
+        self._evaluate = compile_expression(condition)
 
     def execute(self, env: Environment) -> None:
-        def enter(env: Environment) -> bool:
-            return env.evaluate(self.condition)
+        WhileBlock(env, self).will_enter(env)
+
+
+class LoopBlock(Block):
+    """The block of a loop, which stays on the stack while it repeats.
 
-        def exit(env: Environment) -> BlockResult:
-            block.will_enter(env)
+    One block is made each time the loop is started, and the body is
+    repeated by moving the address back to the header.
+    """
+
+    __slots__ = ("indent", "line")
+
+    def __init__(self, kind: BlockKind, env: Environment):
+        self.kind = kind
+        self.indent = env.addr.indent
+        self.line = env.addr.line
+
+    @abc.abstractmethod
+    def advance(self, env: Environment) -> bool:
+        """Prepares the next repetition and returns False at the end."""
+        pass
+
+    def will_enter(self, env: Environment):
+        addr = env.addr
+        addr.indent = self.indent
+        addr.line = self.line
+        if self.advance(env):
+            addr.indent += 1
+            blocks = env.blocks
+            blocks.append(self)
+            counters = env.counters
+            counters.blocks_pushed += 1
+            if len(blocks) > counters.max_block_depth:
+                counters.max_block_depth = len(blocks)
+
+    def did_exit(self, env: Environment) -> BlockResult:
+        addr = env.addr
+        addr.indent = self.indent
+        addr.line = self.line
+        if self.advance(env):
+            addr.indent += 1
             return BlockResult.JUMP
+        # stays on the stack until the last repetition
+        env.blocks.pop()
+        return self.exit(env)
 
-        block = Block(BlockKind.WHILE, env.addr, enter, exit)
-        block.will_enter(env)
+    def exit(self, env: Environment) -> BlockResult:
+        return BlockResult.JUMP
+
+
+class ForBlock(LoopBlock):
+    __slots__ = ("cmd", "iterator")
+
+    def __init__(
+        self,
+        env: Environment,
+        cmd: For,
+        iterator: typing.Iterator[typing.Any],
+    ):
+        super().__init__(BlockKind.FOR, env)
+        self.cmd = cmd
+        self.iterator = iterator
+
+    def advance(self, env: Environment) -> bool:
+        value = next(self.iterator, _STOPPED)
+        if value is _STOPPED:
+            return False
+        self.cmd._assign(env, value)
+        return True
+
+
+class RangeBlock(LoopBlock):
+    """A for loop over a range, which counts without an iterator."""
+
+    __slots__ = ("cmd", "current", "stop", "step")
+
+    def __init__(self, env: Environment, cmd: For, value: range):
+        super().__init__(BlockKind.FOR, env)
+        self.cmd = cmd
+        self.current = value.start
+        self.stop = value.stop
+        self.step = value.step
+
+    def advance(self, env: Environment) -> bool:
+        current = self.current
+        if self.step > 0:
+            if current >= self.stop:
+                return False
+        elif current <= self.stop:
+            return False
+        self.current = current + self.step
+        self.cmd._assign(env, current)
+        return True
+
+
+class WhileBlock(LoopBlock):
+    __slots__ = ("cmd",)
+
+    def __init__(self, env: Environment, cmd: While):
+        super().__init__(BlockKind.WHILE, env)
+        self.cmd = cmd
+
+    def advance(self, env: Environment) -> bool:
+        return self.cmd._evaluate(env)
+
+
+# returned by next() at the end of the iterator
+_STOPPED = object()
 
 
 class Break(Command):
+    __slots__ = ()
+
     def execute(self, env: Environment) -> None:
         while True:
             block = env.blocks.pop()
@@ -78,6 +173,8 @@ class Break(Command):
 
 
 class Continue(Command):
+    __slots__ = ()
+
     def execute(self, env: Environment) -> None:
         while True:
             block = env.blocks.pop()
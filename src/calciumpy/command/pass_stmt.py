@@ -3,15 +3,21 @@ from ..environment import Environment
 
 
 class Comment(Command):
+    __slots__ = ()
+
     def execute(self, env: Environment) -> None:
         pass  # do nothing
 
 
 class Pass(Command):
+    __slots__ = ()
+
     def execute(self, env: Environment) -> None:
         pass  # do nothing
 
 
 class End(Command):
+    __slots__ = ()
+
     def execute(self, env: Environment) -> None:
         pass  # do nothing
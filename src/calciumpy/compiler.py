@@ -0,0 +1,592 @@
+import ast
+import builtins
+import dis
+import json
+import sys
+import types
+import typing
+
+from . import error
+from .element import Element, is_command, read_num
+from .error import (
+    AssignmentNotSupportedError,
+    BaseCalciumError,
+    CallDepthExceededError,
+    KeyNotContainedError,
+    NameNotFoundError,
+    ObjectNotCallableError,
+    ObjectNotIterableError,
+    OutOfRangeError,
+)
+from .index import Index
+from .keyword import Keyword
+from .parser import Parser
+from .runtime import RuntimeResult
+
+# the file name given to compile() to find the frames of the program
+FILENAME = "<calcium>"
+
+_binary_operators: dict[Keyword, ast.operator] = {
+    Keyword.ADD: ast.Add(),
+    Keyword.SUBTRACT: ast.Sub(),
+    Keyword.MULTIPLY: ast.Mult(),
+    Keyword.DIVIDE: ast.Div(),
+    Keyword.FLOOR_DIVIDE: ast.FloorDiv(),
+    Keyword.MODULO: ast.Mod(),
+    Keyword.POWER: ast.Pow(),
+}
+
+_comparisons: dict[Keyword, ast.cmpop] = {
+    Keyword.EQUAL: ast.Eq(),
+    Keyword.NOT_EQUAL: ast.NotEq(),
+    Keyword.LESS_THAN: ast.Lt(),
+    Keyword.LESS_THAN_EQUAL: ast.LtE(),
+    Keyword.GREATER_THAN: ast.Gt(),
+    Keyword.GREATER_THAN_EQUAL: ast.GtE(),
+    Keyword.IN: ast.In(),
+}
+
+_compound_operators: dict[Keyword, ast.operator] = {
+    Keyword.COMPOUND_ADD: ast.Add(),
+    Keyword.COMPOUND_SUBTRACT: ast.Sub(),
+    Keyword.COMPOUND_MULTIPLY: ast.Mult(),
+}
+
+_HEADERS = (Keyword.FOR, Keyword.WHILE, Keyword.DEF, Keyword.CLASS)
+
+
+class Program:
+    """Runs Calcium code as a native Python code object.
+
+    The whole program is translated into a Python module and compiled,
+    so it cannot be paused. This is meant for running code without
+    breakpoints, where every input is supplied in advance.
+
+    Python errors are translated into the errors of Calcium
+    and the line of the Calcium code is kept in `line`.
+    Unlike the Runtime, reading a local variable of a function
+    before assigning to it raises an error instead of reading the global.
+    """
+
+    def __init__(self, code: typing.Union[str, list], decodes_str=False):
+        commands: list
+        if isinstance(code, str):
+            commands = json.loads(code)
+        else:
+            commands = code
+        self.code: list[list[Element]] = commands
+        self.line: typing.Optional[int] = None
+        module = _Translator(commands, decodes_str).translate()
+        self.codeobj: types.CodeType = compile(module, FILENAME, "exec")
+
+    def run(self, inputs: typing.Iterable[str] = ()) -> "RuntimeResult":
+        """Runs the program to the end.
+
+        input() returns the given strings in order
+        and raises EOFError when they run out.
+        """
+        self.line = None
+        inputs_iter = iter(inputs)
+
+        def _input(prompt: typing.Any = "") -> str:
+            try:
+                return next(inputs_iter)
+            except StopIteration:
+                raise EOFError("no more inputs") from None
+
+        builtins_table = dict(builtins.__dict__)
+        builtins_table["input"] = _input
+        builtins_table["__calcium_errors__"] = error
+        globals_table = {"__builtins__": builtins_table, "__name__": "__main__"}
+        try:
+            exec(self.codeobj, globals_table)
+        except BaseException as e:
+            frame = _find_program_frame(e.__traceback__)
+            if frame is None:
+                raise
+            self.line = frame.f_lineno - 1
+            calcium_error = self._translate_error(e, frame)
+            if calcium_error is None:
+                raise
+            raise calcium_error from e
+        return RuntimeResult.TERMINATED
+
+    def _translate_error(
+        self, e: BaseException, frame: types.FrameType
+    ) -> typing.Optional[BaseCalciumError]:
+        if isinstance(e, BaseCalciumError):
+            return None
+        line: list[Element] = self.code[self.line]  # type: ignore
+        if isinstance(e, RecursionError):
+            return CallDepthExceededError(sys.getrecursionlimit())
+        if isinstance(e, NameError):
+            return NameNotFoundError(e.name)  # type: ignore
+        if isinstance(e, IndexError):
+            ref, key = _find_subscript(line, frame, IndexError)
+            return OutOfRangeError(ref, key)
+        if isinstance(e, KeyError):
+            ref, _ = _find_subscript(line, frame, KeyError)
+            return KeyNotContainedError(ref, str(e.args[0]))
+        if isinstance(e, TypeError):
+            kwd = Keyword(line[Index.KEYWORD])
+            message = str(e)
+            if kwd == Keyword.FOR and "not iterable" in message:
+                iterable = Parser().read_expr(line[Index.FOR_ITERABLE])
+                return ObjectNotIterableError(str(iterable))
+            if "item assignment" in message:
+                lhs = Parser().read_assignable(line[Index.ASSIGN_LEFT])
+                return AssignmentNotSupportedError(str(lhs.ref))  # type: ignore
+            if not _raised_by_call(e, frame):
+                # by an operator, as the runtime raises it as it is
+                return None
+            callee = _find_callee(line, frame)
+            if callee is not None:
+                # the same as the runtime, which regards a TypeError
+                # raised by a call as calling an invalid object
+                return ObjectNotCallableError(callee)
+        return None
+
+
+class _Translator:
+    def __init__(self, code: list[list[Element]], decodes_str: bool):
+        self.code = code
+        self.decodes_str = decodes_str
+        self.loops = 0
+        self.functions = 0
+
+    def translate(self) -> ast.Module:
+        body, _ = self.read_block(0, 1)
+        module = ast.Module(body=body, type_ignores=[])
+        return ast.fix_missing_locations(module)
+
+    def read_block(
+        self, start: int, indent: int
+    ) -> tuple[list[ast.stmt], int]:
+        """Reads the commands of a block.
+        Returns the statements and the line after the block."""
+        stmts: list[ast.stmt] = []
+        index = start
+        while index < len(self.code):
+            line = self.code[index]
+            if not is_command(line):
+                index += 1
+                continue
+            line_indent: int = line[Index.INDENT]  # type: ignore
+            if line_indent < indent:
+                break
+            kwd = Keyword(line[Index.KEYWORD])
+            if kwd == Keyword.END:
+                index = len(self.code)
+                break
+            if kwd == Keyword.COMMENT:
+                index += 1
+                continue
+            if kwd == Keyword.IFS:
+                # located at the line of if
+                stmt, index = self.read_ifs(index, line_indent)
+                stmts.append(stmt)
+                continue
+            # Python counts lines from 1
+            lineno = index + 1
+            if kwd in _HEADERS:
+                stmt, index = self.read_header(index, line, kwd)
+            else:
+                stmt = self.read_command(line, kwd)
+                index += 1
+            stmts.append(_locate(stmt, lineno))
+        if len(stmts) == 0:
+            stmts.append(ast.Pass())
+        return stmts, index
+
+    def read_ifs(self, index: int, indent: int) -> tuple[ast.stmt, int]:
+        branches: list[tuple[typing.Optional[ast.expr], list[ast.stmt], int]]
+        branches = []
+        index += 1
+        while index < len(self.code):
+            line = self.code[index]
+            if not is_command(line):
+                index += 1
+                continue
+            if line[Index.INDENT] != indent + 1:
+                break
+            kwd = Keyword(line[Index.KEYWORD])
+            if kwd in (Keyword.IF, Keyword.ELIF):
+                condition = self.read_expr(line[Index.CONDITION])
+            elif kwd == Keyword.ELSE:
+                condition = None
+            else:
+                break
+            lineno = index + 1
+            body, index = self.read_block(index + 1, indent + 2)
+            branches.append((condition, body, lineno))
+
+        orelse: list[ast.stmt] = []
+        for condition, body, lineno in reversed(branches):
+            if condition is None:
+                orelse = body
+                continue
+            stmt = ast.If(test=condition, body=body, orelse=orelse)
+            orelse = [_locate(stmt, lineno)]
+        if len(orelse) == 0:
+            return ast.Pass(), index
+        return orelse[0], index
+
+    def read_header(
+        self, index: int, line: list[Element], kwd: Keyword
+    ) -> tuple[ast.stmt, int]:
+        indent: int = line[Index.INDENT]  # type: ignore
+        if kwd in (Keyword.FOR, Keyword.WHILE):
+            self.loops += 1
+            body, end = self.read_block(index + 1, indent + 1)
+            self.loops -= 1
+            if kwd == Keyword.FOR:
+                return (
+                    ast.For(
+                        target=self.read_target(line[Index.FOR_VARIABLES]),
+                        iter=self.read_expr(line[Index.FOR_ITERABLE]),
+                        body=body,
+                        orelse=[],
+                    ),
+                    end,
+                )
+            return (
+                ast.While(
+                    test=self.read_expr(line[Index.CONDITION]),
+                    body=body,
+                    orelse=[],
+                ),
+                end,
+            )
+        if kwd == Keyword.DEF:
+            loops, self.loops = self.loops, 0
+            self.functions += 1
+            body, end = self.read_block(index + 1, indent + 1)
+            self.functions -= 1
+            self.loops = loops
+            params: list[str] = line[Index.DEF_PARAMETERS]  # type: ignore
+            args = ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg(arg=param) for param in params],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            )
+            return (
+                ast.FunctionDef(
+                    name=line[Index.DEF_NAME],
+                    args=args,
+                    body=body,
+                    decorator_list=[],
+                ),
+                end,
+            )
+        # class
+        loops, functions = self.loops, self.functions
+        self.loops, self.functions = 0, 0
+        body, end = self.read_block(index + 1, indent + 1)
+        self.loops, self.functions = loops, functions
+        superclass = line[Index.CLASS_SUPERCLASS]
+        bases = [] if superclass is None else [self.read_expr(superclass)]
+        return (
+            ast.ClassDef(
+                name=line[Index.CLASS_NAME],
+                bases=bases,
+                keywords=[],
+                body=body,
+                decorator_list=[],
+            ),
+            end,
+        )
+
+    def read_command(self, line: list[Element], kwd: Keyword) -> ast.stmt:
+        if kwd == Keyword.ASSIGN:
+            return ast.Assign(
+                targets=[self.read_target(line[Index.ASSIGN_LEFT])],
+                value=self.read_expr(line[Index.ASSIGN_RIGHT]),
+            )
+        if kwd in _compound_operators:
+            # Calcium does not update the object in place
+            return ast.Assign(
+                targets=[self.read_target(line[Index.ASSIGN_LEFT])],
+                value=ast.BinOp(
+                    left=self.read_expr(line[Index.ASSIGN_LEFT]),
+                    op=_compound_operators[kwd],
+                    right=self.read_expr(line[Index.ASSIGN_RIGHT]),
+                ),
+            )
+        if kwd == Keyword.EXPR_STMT:
+            return ast.Expr(value=self.read_expr(line[Index.EXPR_STMT]))
+        if kwd == Keyword.RETURN:
+            if self.functions == 0:
+                return _raise("InvalidReturnError")
+            if len(line) < Index.RETURN_VALUE + 1:
+                return ast.Return(value=None)
+            return ast.Return(value=self.read_expr(line[Index.RETURN_VALUE]))
+        if kwd == Keyword.BREAK:
+            if self.loops == 0:
+                return _raise("InvalidBreakError")
+            return ast.Break()
+        if kwd == Keyword.CONTINUE:
+            if self.loops == 0:
+                return _raise("InvalidContinueError")
+            return ast.Continue()
+        if kwd == Keyword.IMPORT:
+            path: str = line[Index.IMPORT_PATH]  # type: ignore
+            module_names = path.split(".")
+            for name in module_names:
+                if not name.isalnum():
+                    return _raise("InvalidModuleNameError", name)
+            return ast.Import(names=[ast.alias(name=module_names[0])])
+        if kwd == Keyword.PASS:
+            return ast.Pass()
+        raise ValueError(f"Invalid keyword for command: {kwd.value}")
+
+    def read_target(self, obj: Element) -> ast.expr:
+        kwd = Keyword(obj[Index.EXPRESSION_KEYWORD])  # type: ignore
+        if kwd == Keyword.COMMA:
+            return ast.Tuple(
+                elts=[self.read_target(elem) for elem in obj[1:]],  # type: ignore
+                ctx=ast.Store(),
+            )
+        target = self.read_expr(obj)
+        target.ctx = ast.Store()  # type: ignore
+        return target
+
+    def read_expr(self, obj: Element) -> ast.expr:
+        if not isinstance(obj, list):
+            if isinstance(obj, str) and self.decodes_str:
+                return ast.Constant(value=json.loads(obj))
+            return ast.Constant(value=obj)
+        kwd = Keyword(obj[Index.EXPRESSION_KEYWORD])
+        if kwd == Keyword.NUM:
+            return ast.Constant(value=read_num(obj[Index.NUM_VALUE]))
+        if kwd == Keyword.LIST:
+            return ast.List(
+                elts=[self.read_expr(elem) for elem in obj[1]],  # type: ignore
+                ctx=ast.Load(),
+            )
+        if kwd == Keyword.DICT:
+            return ast.Dict(
+                keys=[self.read_expr(k) for k, _ in obj[1]],  # type: ignore
+                values=[self.read_expr(v) for _, v in obj[1]],  # type: ignore
+            )
+        if kwd in (Keyword.TUPLE, Keyword.COMMA):
+            return ast.Tuple(
+                elts=[self.read_expr(elem) for elem in obj[1:]],
+                ctx=ast.Load(),
+            )
+        if kwd == Keyword.VARIABLE:
+            return ast.Name(id=obj[Index.VAR_NAME], ctx=ast.Load())
+        if kwd == Keyword.ATTRIBUTE:
+            target = obj[Index.ATTR_OBJECT]
+            if isinstance(target, list):
+                value = self.read_expr(target)
+            else:
+                # a literal such as a string is not decoded
+                value = ast.Constant(value=target)
+            for prop in obj[Index.ATTR_NAME :]:
+                value = ast.Attribute(value=value, attr=prop, ctx=ast.Load())
+            return value
+        if kwd == Keyword.SUBSCRIPT:
+            value = self.read_expr(obj[Index.SUBSCRIPT_OBJECT])
+            if len(obj) == Index.SUBSCRIPT_INDEX + 1:
+                key = obj[Index.SUBSCRIPT_INDEX]
+                if key is None:
+                    index: ast.expr = ast.Slice()
+                else:
+                    index = self.read_expr(key)
+            else:
+                start = obj[Index.SUBSCRIPT_SLICE_START]
+                stop = obj[Index.SUBSCRIPT_SLICE_STOP]
+                index = ast.Slice(
+                    lower=None if start is None else self.read_expr(start),
+                    upper=None if stop is None else self.read_expr(stop),
+                )
+            return ast.Subscript(value=value, slice=index, ctx=ast.Load())
+        if kwd == Keyword.CALL:
+            args = []
+            keywords = []
+            for arg in obj[Index.CALL_ARGS]:  # type: ignore
+                if (
+                    isinstance(arg, list)
+                    and len(arg) > 0
+                    and arg[0] == Keyword.KWARG.value
+                ):
+                    keywords.append(
+                        ast.keyword(
+                            arg=arg[Index.KWARG_NAME],
+                            value=self.read_expr(arg[Index.KWARG_VALUE]),
+                        )
+                    )
+                else:
+                    args.append(self.read_expr(arg))
+            return ast.Call(
+                func=self.read_expr(obj[Index.CALL_CALLEE]),
+                args=args,
+                keywords=keywords,
+            )
+        if kwd == Keyword.NOT:
+            return ast.UnaryOp(
+                op=ast.Not(), operand=self.read_expr(obj[Index.UNARY_OPERAND])
+            )
+        if kwd == Keyword.NEGATIVE:
+            return ast.UnaryOp(
+                op=ast.USub(), operand=self.read_expr(obj[Index.UNARY_OPERAND])
+            )
+        left = self.read_expr(obj[Index.LEFT_OPERAND])
+        right = self.read_expr(obj[Index.RIGHT_OPERAND])
+        if kwd in (Keyword.AND, Keyword.OR):
+            op = ast.And() if kwd == Keyword.AND else ast.Or()
+            return ast.BoolOp(op=op, values=[left, right])
+        if kwd in _binary_operators:
+            return ast.BinOp(left=left, op=_binary_operators[kwd], right=right)
+        if kwd in _comparisons:
+            return ast.Compare(
+                left=left, ops=[_comparisons[kwd]], comparators=[right]
+            )
+        # the same as the runtime, which raises it when evaluated
+        return ast.Call(
+            func=_error_class("OperatorNotSupportedError"),
+            args=[ast.Constant(value=str(kwd))],
+            keywords=[],
+        )
+
+
+def _locate(stmt: ast.stmt, lineno: int) -> ast.stmt:
+    stmt.lineno = lineno
+    stmt.end_lineno = lineno
+    stmt.col_offset = 0
+    stmt.end_col_offset = 0
+    return stmt
+
+
+def _error_class(name: str) -> ast.expr:
+    return ast.Attribute(
+        value=ast.Name(id="__calcium_errors__", ctx=ast.Load()),
+        attr=name,
+        ctx=ast.Load(),
+    )
+
+
+def _raise(name: str, *args: str) -> ast.stmt:
+    return ast.Raise(
+        exc=ast.Call(
+            func=_error_class(name),
+            args=[ast.Constant(value=arg) for arg in args],
+            keywords=[],
+        )
+    )
+
+
+def _find_program_frame(
+    tb: typing.Optional[types.TracebackType],
+) -> typing.Optional[types.FrameType]:
+    # the innermost frame of the program
+    frame = None
+    while tb is not None:
+        if tb.tb_frame.f_code.co_filename == FILENAME:
+            frame = tb.tb_frame
+        tb = tb.tb_next
+    return frame
+
+
+def _raised_by_call(e: BaseException, frame: types.FrameType) -> bool:
+    """Returns whether the error is raised by the instruction of the
+    frame calling an object, which includes the functions it calls."""
+    tb = e.__traceback__
+    lasti = -1
+    while tb is not None:
+        if tb.tb_frame is frame:
+            lasti = tb.tb_lasti
+        tb = tb.tb_next
+    for instr in dis.get_instructions(frame.f_code):
+        if instr.offset == lasti:
+            return instr.opname.startswith(("CALL", "PRECALL"))
+    return False
+
+
+_MISSING = object()
+
+
+def _peek(obj: Element, frame: types.FrameType) -> typing.Any:
+    """Evaluates a variable, an attribute or a literal in the frame
+    without calling any function."""
+    if not isinstance(obj, list):
+        return obj
+    kwd = obj[Index.EXPRESSION_KEYWORD]
+    if kwd == Keyword.NUM.value:
+        return read_num(obj[Index.NUM_VALUE])
+    if kwd == Keyword.VARIABLE.value:
+        name: str = obj[Index.VAR_NAME]  # type: ignore
+        for table in (frame.f_locals, frame.f_globals, frame.f_builtins):
+            if name in table:
+                return table[name]
+        return _MISSING
+    if kwd == Keyword.ATTRIBUTE.value:
+        value = _peek(obj[Index.ATTR_OBJECT], frame)
+        for prop in obj[Index.ATTR_NAME :]:
+            if value is _MISSING:
+                break
+            value = getattr(value, prop, _MISSING)  # type: ignore
+        return value
+    return _MISSING
+
+
+def _walk(obj: Element, kwd: Keyword) -> typing.Iterator[list[Element]]:
+    # yields the expressions with the keyword in the element
+    if not isinstance(obj, list):
+        return
+    if len(obj) > 0 and obj[0] == kwd.value:
+        yield obj
+    for elem in obj:
+        yield from _walk(elem, kwd)
+
+
+def _find_subscript(
+    line: list[Element],
+    frame: types.FrameType,
+    error_type: type,
+) -> tuple[str, str]:
+    """Finds the subscript raising the error in the line.
+    Returns the strings of the reference and the key."""
+    parser = Parser()
+    subscripts = [
+        sub
+        for sub in _walk(line[Index.KEYWORD + 1 :], Keyword.SUBSCRIPT)
+        if len(sub) == Index.SUBSCRIPT_INDEX + 1
+    ]
+    for sub in subscripts:
+        obj = _peek(sub[Index.SUBSCRIPT_OBJECT], frame)
+        key = _peek(sub[Index.SUBSCRIPT_INDEX], frame)
+        if obj is _MISSING or key is _MISSING:
+            continue
+        try:
+            obj[key]
+        except error_type:
+            ref = parser.read_assignable(sub[Index.SUBSCRIPT_OBJECT])
+            return str(ref), str(key)
+        except Exception:
+            continue
+    if len(subscripts) == 0:
+        return "", ""
+    sub = subscripts[0]
+    ref = parser.read_assignable(sub[Index.SUBSCRIPT_OBJECT])
+    key = parser.read_expr(sub[Index.SUBSCRIPT_INDEX])
+    return str(ref), str(key)
+
+
+def _find_callee(
+    line: list[Element], frame: types.FrameType
+) -> typing.Optional[str]:
+    calls = list(_walk(line[Index.KEYWORD + 1 :], Keyword.CALL))
+    for call in calls:
+        funcobj = _peek(call[Index.CALL_CALLEE], frame)
+        if funcobj is not _MISSING and not callable(funcobj):
+            return str(funcobj)
+    if len(calls) == 0:
+        return None
+    # the innermost call is evaluated first
+    funcobj = _peek(calls[-1][Index.CALL_CALLEE], frame)
+    if funcobj is _MISSING:
+        return str(Parser().read_assignable(calls[-1][Index.CALL_CALLEE]))
+    return str(funcobj)
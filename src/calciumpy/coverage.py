@@ -0,0 +1,88 @@
+import typing
+
+from .command.command import Command
+from .environment import Environment, Execute, Hook
+from .profiler import SourceMap
+
+if typing.TYPE_CHECKING:
+    from .runtime import Runtime
+
+
+class Coverage:
+    """Marks the lines of the code executed while it is enabled.
+
+    `lines` has a byte for each line of the code, which is 1 when the
+    command on it has been executed. The coverages of the runs of the
+    same code are merged into one. Like the profilers, it wraps how
+    the environment executes a command only while it is enabled.
+    The ifs commands made by the converter are not marked, but they
+    are on the same lines of the source as their if commands.
+    """
+
+    def __init__(self, size: int):
+        self.lines = bytearray(size)
+        self._runtime: typing.Optional["Runtime"] = None
+        self._hook: typing.Optional[Hook] = None
+
+    @classmethod
+    def of(cls, runtime: "Runtime") -> "Coverage":
+        """Returns the coverage of the code of the runtime,
+        enabled for it."""
+        coverage = cls(len(runtime.env.code))
+        coverage.enable(runtime)
+        return coverage
+
+    def enable(self, runtime: "Runtime") -> None:
+        if self._runtime is not None:
+            self.disable()
+        lines = self.lines
+
+        def hook(execute: Execute) -> Execute:
+            def execute_covered(env: Environment, cmd: Command) -> None:
+                lines[env.addr.line] = 1
+                execute(env, cmd)
+
+            return execute_covered
+
+        self._runtime = runtime
+        self._hook = hook
+        runtime.env.add_hook(hook)
+
+    def disable(self) -> None:
+        if self._runtime is not None:
+            self._runtime.env.remove_hook(self._hook)  # type: ignore
+            self._runtime = None
+            self._hook = None
+
+    def __enter__(self) -> "Coverage":
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.disable()
+
+    def merge(self, other: typing.Union["Coverage", bytes, bytearray]) -> None:
+        """Marks the lines executed in another run of the same code."""
+        lines = other.lines if isinstance(other, Coverage) else other
+        if len(lines) != len(self.lines):
+            raise ValueError("the coverage is of other code")
+        # each byte is 0 or 1, so the bytes are or-ed at once
+        merged = int.from_bytes(self.lines, "little") | int.from_bytes(
+            lines, "little"
+        )
+        self.lines[:] = merged.to_bytes(len(self.lines), "little")
+
+    def executed(
+        self, source_map: typing.Optional[SourceMap] = None
+    ) -> list[int]:
+        """Returns the executed lines, which are the lines of the
+        source with a source map."""
+        indexes = [i for i, hit in enumerate(self.lines) if hit]
+        if source_map is None:
+            return indexes
+        lines = {source_map[i] for i in indexes}
+        return sorted(line for line in lines if line is not None)
+
+    def missing(self, source_map: SourceMap) -> list[int]:
+        """Returns the lines of the source never executed."""
+        lines = {line for line in source_map if line is not None}
+        return sorted(lines.difference(self.executed(source_map)))
@@ -1,4 +1,24 @@
 import typing
 
 
-Element = typing.Union[int, str, bool, list, dict, None]
+Element = typing.Union[int, float, str, bool, list, dict, None]
+
+
+def is_command(element: Element) -> bool:
+    # a command starts with its indent
+    return (
+        isinstance(element, list)
+        and len(element) > 0
+        and isinstance(element[0], int)
+    )
+
+
+def read_num(value: Element) -> typing.Union[int, float]:
+    """Returns the value of a num element, which is a string in JSON
+    and has already been decoded in the bytecode."""
+    if not isinstance(value, str):
+        return value  # type: ignore
+    try:
+        return int(value, base=0)
+    except ValueError:
+        return float(value)
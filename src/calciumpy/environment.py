@@ -1,50 +1,84 @@
 import json
 import typing
 
-from .keyword import Keyword
 from .address import Address
 from .block_result import BlockResult
 from .element import Element
-from .index import Index
+from .expression.expression import Expression
+from .jump_table import JumpTable
+from .metrics import Counters
 from .namespace import GlobalScope, Namespace
 
+if typing.TYPE_CHECKING:
+    from .profiler import CallProfiler
 
-class NextLineCalculation:
-    def __init__(self, block_result: BlockResult, processing_line: int):
-        self.block_result = block_result
-        self.processing_line = processing_line
+# the number of nested calls allowed by default
+MAX_DEPTH = 10000
+
+# how a command is executed, and a hook wrapping it
+Execute = typing.Callable[["Environment", typing.Any], None]
+Hook = typing.Callable[[Execute], Execute]
 
 
 class Environment:
-    def __init__(self, code: list, decodes_str=False):
+    def __init__(self, code: list, decodes_str=False, max_depth=MAX_DEPTH):
         from .block import Block
+        from .executor import Frame, execute_command
 
         self.code: list[list[Element]] = code
+        # filled with the parsed commands by the runtime, one per line
+        self.commands: tuple = ()
+        self.jump_table = JumpTable(code)
         self.addr = Address(1, 0)
         self.blocks: list[Block] = []
         self.callstack: list[Namespace] = []
+        # the commands waiting for their callees to return
+        self.frames: list[Frame] = []
+        self.max_depth = max_depth
+        # wrapped by the hooks of the profilers to watch each command
+        self.execute: Execute = execute_command
+        self.hooks: list[Hook] = []
+        # told of the calls while it is enabled
+        self.call_profiler: typing.Optional["CallProfiler"] = None
+        self.counters = Counters()
+        # the budget of Runtime.run_for(), also checked in the functions
+        # called by library code
+        self.step_limit: typing.Optional[int] = None
+        self.deadline: typing.Optional[float] = None
 
         self.global_context = GlobalScope(None, {})
         self.context: Namespace = self.global_context
 
         self.prompt = ""
         self.returned_value: typing.Any = None
+        # results of the calls evaluated by the command being executed
+        self.activation: dict[typing.Any, typing.Any] = {}
 
         self.decodes_str = decodes_str
 
-    def evaluate(self, obj: typing.Any) -> typing.Any:
-        # to avoid circular imports, these must be written here
-        from .expression.assignable import Assignable
-        from .expression.call import Call
-        from .expression.operator import UnaryOperator, BinaryOperator
+    def add_hook(self, hook: Hook) -> None:
+        """Wraps how a command is executed. The hook is called with
+        how it is executed by the hooks added before, and returns the
+        function executing a command instead."""
+        self.hooks.append(hook)
+        self._chain_hooks()
 
-        if isinstance(obj, Assignable):
-            return obj.evaluate(self)
-        if isinstance(obj, BinaryOperator):
-            return obj.evaluate(self)
-        if isinstance(obj, Call):
-            return obj.evaluate(self)
-        if isinstance(obj, UnaryOperator):
+    def remove_hook(self, hook: Hook) -> None:
+        self.hooks.remove(hook)
+        self._chain_hooks()
+
+    def _chain_hooks(self) -> None:
+        from .executor import execute_command
+
+        execute: Execute = execute_command
+        for hook in self.hooks:
+            execute = hook(execute)
+        self.execute = execute
+
+    def evaluate(self, obj: typing.Any) -> typing.Any:
+        # commands evaluate the compiled closures of their expressions,
+        # so this is only for the values given from outside of them
+        if isinstance(obj, Expression):
             return obj.evaluate(self)
         if isinstance(obj, list):
             return [self.evaluate(elem) for elem in obj]
@@ -61,66 +95,17 @@ class Environment:
         return obj
 
     def update_addr_to_next_command(self) -> None:
-        next_line_index = 0
-        while True:
-            next_line_index = self.addr.line + 1
-            calculating_next_line = self._pop_blocks(next_line_index)
-            next_line_index = calculating_next_line.processing_line
-            if calculating_next_line.block_result == BlockResult.SHIFT:
-                break
-        self.addr.line = next_line_index
-
-    def _pop_blocks(self, line_index: int) -> NextLineCalculation:
-        working_line_index = line_index
+        jump_table = self.jump_table
         while True:
-            next_line: list[Element] = self._retrieve_next_line(
-                working_line_index
-            )
-            next_indent: int = next_line[Index.INDENT]  # type: ignore
-            delta_indent = self.addr.indent - next_indent
-            if delta_indent < 0:
-                working_line_index += 1
-                continue
+            next_line = jump_table.next_line(self.addr.line, self.addr.indent)
+            delta_indent = self.addr.indent - jump_table.indents[next_line]
+            block_result = BlockResult.SHIFT
             for _ in range(delta_indent):
                 block = self.blocks[-1]
                 block_result = block.did_exit(self)
                 if block_result == BlockResult.JUMP:
-                    return NextLineCalculation(
-                        BlockResult.JUMP, working_line_index
-                    )
-            return NextLineCalculation(BlockResult.SHIFT, working_line_index)
-
-    def _retrieve_next_line(
-        self, working_line: typing.Optional[int] = None
-    ) -> list[Element]:
-        if working_line is None:
-            element = self.code[self.addr.line]
-            while True:
-                if (
-                    isinstance(element, list)
-                    and len(element) > 0
-                    and isinstance(element[0], int)
-                ):
-                    return element
-                elif self.addr.line >= len(self.code) - 1:
+                    # the address has been moved by the block
                     break
-                else:
-                    self.addr.shift(0, 1)
-                    element = self.code[self.addr.line]
-                    continue
-            return [1, [], Keyword.END.value]
-        element = self.code[working_line]
-        while True:
-            if (
-                isinstance(element, list)
-                and len(element) > 0
-                and isinstance(element[0], int)
-            ):
-                return element
-            elif working_line >= len(self.code) - 1:
+            if block_result == BlockResult.SHIFT:
                 break
-            else:
-                working_line += 1
-                element = self.code[working_line]
-                continue
-        return [1, [], Keyword.END.value]
+        self.addr.line = next_line
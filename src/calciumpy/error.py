@@ -9,6 +9,17 @@ class AssignmentNotSupportedError(BaseCalciumError):
         self.obj = obj
 
 
+class BudgetExceededError(BaseCalciumError):
+    def __init__(self):
+        super().__init__("budget exceeded in a call from library code")
+
+
+class CallDepthExceededError(BaseCalciumError):
+    def __init__(self, depth: int):
+        super().__init__(f"maximum call depth {depth} exceeded")
+        self.depth = depth
+
+
 class InvalidBreakError(BaseCalciumError):
     def __init__(self):
         super().__init__("break statement not within loop")
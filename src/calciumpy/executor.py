@@ -0,0 +1,101 @@
+import time
+import typing
+
+from .command.command import Command
+from .command.pass_stmt import Comment
+from .environment import Environment
+from .error import BudgetExceededError
+from .label import FunctionCalled
+
+
+_skip = Comment()
+
+# the number of steps between two checks of the clock
+CLOCK_INTERVAL = 1024
+
+
+class Frame:
+    """A command waiting for the function called by it to return.
+
+    The frames are kept in `env.frames` instead of the Python stack,
+    so the calls from the interpreter and the callbacks from library
+    code share one stack.
+    """
+
+    __slots__ = ("line", "calls", "cmd", "activation")
+
+    def __init__(
+        self,
+        line: int,
+        calls: int,
+        cmd: Command,
+        activation: dict[typing.Any, typing.Any],
+    ):
+        self.line = line
+        self.calls = calls
+        self.cmd = cmd
+        self.activation = activation
+
+
+def fetch_command(env: Environment) -> Command:
+    """Returns the command at the address of the environment,
+    which is the waiting one when its callee has returned."""
+    addr = env.addr
+    frames = env.frames
+    if len(frames) > 0:
+        frame = frames[-1]
+        if frame.line == addr.line and frame.calls == addr.calls:
+            frames.pop()
+            env.activation = frame.activation
+            return frame.cmd
+    env.activation = {}
+    cmd = env.commands[addr.line]
+    if cmd is None:
+        # the first line may not be a command
+        return _skip
+    return cmd
+
+
+def execute_command(env: Environment, cmd: Command) -> None:
+    line = env.addr.line
+    calls = env.addr.calls
+    try:
+        cmd.execute(env)
+    except FunctionCalled:
+        env.frames.append(Frame(line, calls, cmd, env.activation))
+
+
+def run_until_exited(env: Environment, block: typing.Any) -> None:
+    """Runs the body of the function called by library code
+    until the call block is exited."""
+    caller_activation = env.activation
+    counters = env.counters
+    try:
+        while True:
+            env.update_addr_to_next_command()
+            if block.exited:
+                # the end of the body has been reached
+                break
+            counters.steps += 1
+            if env.step_limit is not None or env.deadline is not None:
+                _check_budget(env)
+            env.execute(env, fetch_command(env))
+            if block.exited:
+                # moves to the caller from the line before it
+                env.update_addr_to_next_command()
+                break
+    finally:
+        env.activation = caller_activation
+
+
+def _check_budget(env: Environment) -> None:
+    # the library code cannot be paused, so the call is abandoned
+    steps = env.counters.steps
+    if env.step_limit is not None and steps > env.step_limit:
+        raise BudgetExceededError()
+    if (
+        env.deadline is not None
+        and steps % CLOCK_INTERVAL == 0
+        and time.monotonic() >= env.deadline
+    ):
+        raise BudgetExceededError()
@@ -6,57 +6,147 @@ from ..error import (
     KeyNotContainedError,
     AssignmentNotSupportedError,
 )
-from dataclasses import dataclass
+from .compiler import compile_expression
+from .expression import Evaluator, Expression
+from ..namespace import UNBOUND
 
+Assigner = typing.Callable[[Environment, typing.Any], None]
 
-@dataclass(frozen=True)
-class Assignable(abc.ABC):
-    @abc.abstractmethod
-    def assign(self, value: typing.Any, env: Environment) -> None:
-        pass
+
+class Assignable(Expression):
+    __slots__ = ()
 
     @abc.abstractmethod
-    def evaluate(self, env: Environment) -> typing.Any:
+    def compile_assign(self) -> Assigner:
+        """Returns a closure that assigns a value to this reference
+        when called with the environment and the value."""
         pass
 
+    def assign(self, value: typing.Any, env: Environment) -> None:
+        self.compile_assign()(env, value)
+
+
+def compile_target(target: typing.Union[Assignable, tuple]) -> Assigner:
+    """Compiles the left-hand side of an assignment,
+    which can be a tuple of references."""
+    if isinstance(target, Assignable):
+        return target.compile_assign()
+    targets = tuple(compile_target(elem) for elem in target)
+
+    def assign(env: Environment, value: typing.Any) -> None:
+        for assign_elem, elem in zip(targets, value):
+            assign_elem(env, elem)
+
+    return assign
+
 
 class Variable(Assignable):
+    __slots__ = ("name",)
+
     def __init__(self, name: str) -> None:
         self.name = name
 
-    def assign(self, value: typing.Any, env: Environment) -> None:
-        env.context.define(self.name, value)
+    def compile(self) -> Evaluator:
+        name = self.name
+
+        def evaluate(env: Environment) -> typing.Any:
+            return env.context.lookup(name)
+
+        return evaluate
 
-    def evaluate(self, env: Environment) -> typing.Any:
-        return env.context.lookup(self.name)
+    def compile_assign(self) -> Assigner:
+        name = self.name
+
+        def assign(env: Environment, value: typing.Any) -> None:
+            env.context.define(name, value)
+
+        return assign
 
     def __str__(self) -> str:
         return self.name
 
 
+class LocalVariable(Variable):
+    """A local variable of a function read from the slot of the frame."""
+
+    __slots__ = ("slot",)
+
+    def __init__(self, name: str, slot: int) -> None:
+        super().__init__(name)
+        self.slot = slot
+
+    def compile(self) -> Evaluator:
+        name = self.name
+        slot = self.slot
+
+        def evaluate(env: Environment) -> typing.Any:
+            value = env.context.slots[slot]  # type: ignore
+            if value is UNBOUND:
+                # read the outer scope as the dict of the frame does
+                return env.context.parent.lookup(name)  # type: ignore
+            return value
+
+        return evaluate
+
+    def compile_assign(self) -> Assigner:
+        slot = self.slot
+
+        def assign(env: Environment, value: typing.Any) -> None:
+            env.context.slots[slot] = value  # type: ignore
+
+        return assign
+
+
 class Attribute(Assignable):
+    __slots__ = ("obj", "properties")
+
     def __init__(
         self, obj: typing.Union[str, Assignable], properties: list[str]
     ) -> None:
         self.obj = obj
         self.properties = properties
 
-    def assign(self, value: typing.Any, env: Environment) -> None:
-        target = self._lookup(env)
-        for prop in self.properties[:-1]:
-            target = getattr(target, prop)
-        setattr(target, self.properties[-1], value)
-
-    def evaluate(self, env: Environment) -> typing.Any:
-        target = self._lookup(env)
-        for prop in self.properties:
-            target = getattr(target, prop)
-        return target
-
-    def _lookup(self, env: Environment) -> typing.Any:
+    def compile(self) -> Evaluator:
+        lookup = self._compile_lookup()
+        properties = tuple(self.properties)
+        if len(properties) == 1:
+            prop = properties[0]
+
+            def evaluate(env: Environment) -> typing.Any:
+                return getattr(lookup(env), prop)
+
+            return evaluate
+
+        def evaluate_chain(env: Environment) -> typing.Any:
+            target = lookup(env)
+            for prop in properties:
+                target = getattr(target, prop)
+            return target
+
+        return evaluate_chain
+
+    def compile_assign(self) -> Assigner:
+        lookup = self._compile_lookup()
+        properties = tuple(self.properties[:-1])
+        last_prop = self.properties[-1]
+
+        def assign(env: Environment, value: typing.Any) -> None:
+            target = lookup(env)
+            for prop in properties:
+                target = getattr(target, prop)
+            setattr(target, last_prop, value)
+
+        return assign
+
+    def _compile_lookup(self) -> Evaluator:
         if isinstance(self.obj, Assignable):
-            return self.obj.evaluate(env)
-        return self.obj
+            return self.obj.compile()
+        obj = self.obj  # a literal such as a string is not decoded
+
+        def lookup(env: Environment) -> typing.Any:
+            return obj
+
+        return lookup
 
     def __str__(self) -> str:
         return f'{self.obj}.{".".join(self.properties)}'
@@ -67,6 +157,8 @@ KeyIndex = typing.Union[int, Variable]
 
 
 class Subscript(Assignable):
+    __slots__ = ("ref", "key", "start", "stop")
+
     def __init__(
         self,
         ref: Assignable,
@@ -79,58 +171,55 @@ class Subscript(Assignable):
         self.start = start
         self.stop = stop
 
-    def assign(self, value: typing.Any, env: Environment) -> None:
-        obj: typing.Any = self.ref.evaluate(env)
-        key: typing.Any = env.evaluate(self.key)
-        start: typing.Optional[int] = env.evaluate(self.start)
-        stop: typing.Optional[int] = env.evaluate(self.stop)
+    def compile(self) -> Evaluator:
+        ref = self.ref.compile()
+        if self.key is None:
+            start = compile_expression(self.start)
+            stop = compile_expression(self.stop)
+
+            def evaluate_slice(env: Environment) -> typing.Any:
+                return ref(env)[start(env) : stop(env)]
+
+            return evaluate_slice
 
-        if key is not None:
+        key = compile_expression(self.key)
+
+        def evaluate(env: Environment) -> typing.Any:
+            obj = ref(env)
+            k = key(env)
             try:
-                obj[key] = value
-                return
+                return obj[k]
             except IndexError:
-                raise OutOfRangeError(str(self.ref), str(key))
-            except TypeError:
-                raise AssignmentNotSupportedError(str(self.ref))
-        if start is None:
-            if stop is None:
-                obj[:] = value
-                return
-            else:
-                obj[:stop] = value
-                return
-        else:
-            if stop is None:
-                obj[start:] = value
-                return
-            else:
-                obj[start:stop] = value
-                return
-
-    def evaluate(self, env: Environment) -> typing.Any:
-        obj: typing.Any = self.ref.evaluate(env)
-        key: typing.Any = env.evaluate(self.key)
-        start: typing.Optional[int] = env.evaluate(self.start)
-        stop: typing.Optional[int] = env.evaluate(self.stop)
-
-        if key is not None:
+                raise OutOfRangeError(str(self.ref), str(k))
+            except KeyError:
+                raise KeyNotContainedError(str(self.ref), str(k))
+
+        return evaluate
+
+    def compile_assign(self) -> Assigner:
+        ref = self.ref.compile()
+        if self.key is None:
+            start = compile_expression(self.start)
+            stop = compile_expression(self.stop)
+
+            def assign_slice(env: Environment, value: typing.Any) -> None:
+                ref(env)[start(env) : stop(env)] = value
+
+            return assign_slice
+
+        key = compile_expression(self.key)
+
+        def assign(env: Environment, value: typing.Any) -> None:
+            obj = ref(env)
+            k = key(env)
             try:
-                return obj[key]
+                obj[k] = value
             except IndexError:
-                raise OutOfRangeError(str(self.ref), str(key))
-            except KeyError:
-                raise KeyNotContainedError(str(self.ref), str(key))
-        if start is None:
-            if stop is None:
-                return obj[:]
-            else:
-                return obj[:stop]
-        else:
-            if stop is None:
-                return obj[start:]
-            else:
-                return obj[start:stop]
+                raise OutOfRangeError(str(self.ref), str(k))
+            except TypeError:
+                raise AssignmentNotSupportedError(str(self.ref))
+
+        return assign
 
     def __str__(self) -> str:
         return f"{self.ref}[{self.key}]"
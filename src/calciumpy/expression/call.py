@@ -1,14 +1,21 @@
-from inspect import signature
+from types import MethodType, ModuleType
 import typing
 from .assignable import Attribute, Variable
-from ..command.class_stmt import Class
-from ..command.function import Def
+from .compiler import compile_expression
+from .expression import Evaluator, Expression
+from ..command.function import UserFunction
 from ..environment import Environment
 from ..error import ObjectNotCallableError
-from ..label import InputCalled
+from ..label import FunctionCalled, InputCalled
 
 
-class Call:
+# marks a call whose callee has not returned yet
+_CALLING = object()
+
+
+class Call(Expression):
+    __slots__ = ("callee", "args")
+
     def __init__(
         self,
         callee: typing.Union[Variable, Attribute],
@@ -16,67 +23,184 @@ class Call:
     ) -> None:
         self.callee = callee
         self.args = args
-        self.value: typing.Any = None
-        self.is_called = False
-        self.is_returned = False
-
-    def evaluate(self, env: Environment) -> typing.Any:
-        funcobj = self.callee.evaluate(env)
-        kwargs = {
-            arg.kwd: env.evaluate(arg.value)
-            for arg in self.args
-            if isinstance(arg, KeywordArgument)
-        }
-        evaluated_args = [
-            env.evaluate(arg)
+
+    def compile(self) -> Evaluator:
+        callee = self.callee.compile()
+        args = tuple(
+            compile_expression(arg)
             for arg in self.args
             if not isinstance(arg, KeywordArgument)
-        ]
-
-        # built-in input() function requires the runtime to be paused
-        if funcobj is input:
-            if not self.is_called:
-                self.is_called = True
-                if len(evaluated_args) > 0:
-                    env.prompt = evaluated_args[0]
-                raise InputCalled()
-            if not self.is_returned:
-                self.is_returned = True
-                self.value = env.returned_value
-                env.prompt = ""
-            return self.value
-        if funcobj is super:
-            if not self.is_called:
-                this = env.context.lookup("self")
-                klass = this.__class__
-                self.is_called, self.is_returned = True, True
-                self.value = super(klass, this)
-            return self.value
-
-        if not self.is_called:
-            self.is_called = True
-            if callable(funcobj) and funcobj.__module__ in (
-                Class.__module__,
-                Def.__module__,
-            ):
-                # user defined function
-                sig = signature(funcobj)
-                if "*args" in str(sig):
-                    kwargs["is_called_by_library"] = False
-            try:
-                self.value = funcobj(*evaluated_args, **kwargs)
-                self.is_returned = True  # built-ins also reach here
-                return self.value
-            except TypeError:
-                raise ObjectNotCallableError(str(funcobj))
-        if not self.is_returned:
-            self.is_returned = True
-            self.value = env.returned_value
-            env.returned_value = None
-        return self.value
+        )
+        kwargs = tuple(
+            (arg.kwd, compile_expression(arg.value))
+            for arg in self.args
+            if isinstance(arg, KeywordArgument)
+        )
+
+        # the last callee and how it is called
+        cached_callee: typing.Any = None
+        cached_call: _Dispatch = _call_object
+
+        def evaluate(env: Environment) -> typing.Any:
+            nonlocal cached_callee, cached_call
+            # The results are stored in the activation of the command
+            # so that the same Call can be shared by recursive calls.
+            activation = env.activation
+            if self in activation:
+                return _returned_value(env, self)
+            funcobj = callee(env)
+            evaluated_kwargs = {kwd: value(env) for kwd, value in kwargs}
+            evaluated_args = [arg(env) for arg in args]
+            if funcobj is not cached_callee:
+                call = _dispatch(funcobj)
+                # a bound method is made for each call, so it is not
+                # cached not to keep its object alive
+                if not _is_bound(funcobj):
+                    cached_callee = funcobj
+                    cached_call = call
+                return call(
+                    env, self, funcobj, evaluated_args, evaluated_kwargs
+                )
+            return cached_call(
+                env, self, funcobj, evaluated_args, evaluated_kwargs
+            )
+
+        return evaluate
+
+
+def _returned_value(env: Environment, call: Call) -> typing.Any:
+    value = env.activation[call]
+    if value is _CALLING:
+        # the callee has returned or input() has been resumed
+        value = env.returned_value
+        env.returned_value = None
+        env.prompt = ""
+        env.activation[call] = value
+    return value
+
+
+def _is_bound(funcobj: typing.Any) -> bool:
+    this = getattr(funcobj, "__self__", None)
+    # the built-in functions are bound to their module
+    return this is not None and type(this) is not ModuleType
+
+
+_Dispatch = typing.Callable[
+    [Environment, Call, typing.Any, list[typing.Any], dict[str, typing.Any]],
+    typing.Any,
+]
+
+
+def _dispatch(funcobj: typing.Any) -> _Dispatch:
+    """Returns how the object is called, which is cached by the call."""
+    # built-in input() function requires the runtime to be paused
+    if funcobj is input:
+        return _call_input
+    if funcobj is super:
+        return _call_super
+    kind = type(funcobj)
+    if kind is UserFunction:
+        return _call_function
+    if kind is MethodType and type(funcobj.__func__) is UserFunction:
+        return _call_method
+    if isinstance(funcobj, type):
+        init = getattr(funcobj, "__init__", None)
+        if type(init) is UserFunction:
+            return _call_class
+    return _call_object
+
+
+def _call_input(
+    env: Environment,
+    call: Call,
+    funcobj: typing.Any,
+    args: list[typing.Any],
+    kwargs: dict[str, typing.Any],
+) -> typing.Any:
+    env.activation[call] = _CALLING
+    if len(args) > 0:
+        env.prompt = args[0]
+    raise InputCalled()
+
+
+def _call_super(
+    env: Environment,
+    call: Call,
+    funcobj: typing.Any,
+    args: list[typing.Any],
+    kwargs: dict[str, typing.Any],
+) -> typing.Any:
+    this = env.context.lookup("self")
+    klass = this.__class__
+    value = super(klass, this)
+    env.activation[call] = value
+    return value
+
+
+def _call_function(
+    env: Environment,
+    call: Call,
+    funcobj: typing.Any,
+    args: list[typing.Any],
+    kwargs: dict[str, typing.Any],
+) -> typing.Any:
+    if len(kwargs) > 0:
+        return _call_object(env, call, funcobj, args, kwargs)
+    env.activation[call] = _CALLING
+    funcobj.enter(args)
+    # controls the flow of the program
+    raise FunctionCalled()
+
+
+def _call_method(
+    env: Environment,
+    call: Call,
+    funcobj: typing.Any,
+    args: list[typing.Any],
+    kwargs: dict[str, typing.Any],
+) -> typing.Any:
+    args.insert(0, funcobj.__self__)
+    return _call_function(env, call, funcobj.__func__, args, kwargs)
+
+
+def _call_class(
+    env: Environment,
+    call: Call,
+    funcobj: typing.Any,
+    args: list[typing.Any],
+    kwargs: dict[str, typing.Any],
+) -> typing.Any:
+    # the instances of builtin bases are built from the arguments
+    if len(kwargs) > 0 or funcobj.__new__ is not object.__new__:
+        return _call_object(env, call, funcobj, args, kwargs)
+    # __init__ returns the instance when the body has been run
+    args.insert(0, funcobj.__new__(funcobj))
+    return _call_function(env, call, funcobj.__init__, args, kwargs)
+
+
+def _call_object(
+    env: Environment,
+    call: Call,
+    funcobj: typing.Any,
+    args: list[typing.Any],
+    kwargs: dict[str, typing.Any],
+) -> typing.Any:
+    activation = env.activation
+    activation[call] = _CALLING
+    try:
+        if env.call_profiler is None:
+            value = funcobj(*args, **kwargs)
+        else:
+            value = env.call_profiler.call_host(funcobj, args, kwargs)
+    except TypeError:
+        raise ObjectNotCallableError(str(funcobj))
+    activation[call] = value  # built-ins also reach here
+    return value
 
 
 class KeywordArgument:
+    __slots__ = ("kwd", "value")
+
     def __init__(self, kwd: str, value: typing.Any) -> None:
         self.kwd = kwd
         self.value = value
@@ -0,0 +1,78 @@
+import json
+import typing
+from .expression import Evaluator, Expression
+from ..environment import Environment
+
+
+def is_constant(obj: typing.Any) -> bool:
+    return obj is None or type(obj) in (int, float, bool)
+
+
+def compile_expression(obj: typing.Any) -> Evaluator:
+    """Turns a parsed expression into a closure called as fn(env)."""
+    if isinstance(obj, Expression):
+        return obj.compile()
+    compile_literal = _literals.get(type(obj))
+    if compile_literal is not None:
+        return compile_literal(obj)
+
+    def evaluate(env: Environment) -> typing.Any:
+        return obj
+
+    return evaluate
+
+
+def _compile_list(obj: list) -> Evaluator:
+    elems = tuple(compile_expression(elem) for elem in obj)
+
+    def evaluate(env: Environment) -> list:
+        return [elem(env) for elem in elems]
+
+    return evaluate
+
+
+def _compile_tuple(obj: tuple) -> Evaluator:
+    elems = tuple(compile_expression(elem) for elem in obj)
+
+    def evaluate(env: Environment) -> tuple:
+        return tuple([elem(env) for elem in elems])
+
+    return evaluate
+
+
+def _compile_set(obj: set) -> Evaluator:
+    elems = tuple(compile_expression(elem) for elem in obj)
+
+    def evaluate(env: Environment) -> set:
+        return {elem(env) for elem in elems}
+
+    return evaluate
+
+
+def _compile_dict(obj: dict) -> Evaluator:
+    items = tuple(
+        (compile_expression(k), compile_expression(v)) for k, v in obj.items()
+    )
+
+    def evaluate(env: Environment) -> dict:
+        return {k(env): v(env) for k, v in items}
+
+    return evaluate
+
+
+def _compile_str(obj: str) -> Evaluator:
+    def evaluate(env: Environment) -> typing.Any:
+        if env.decodes_str:
+            return json.loads(obj)
+        return obj
+
+    return evaluate
+
+
+_literals: dict[type, typing.Callable[[typing.Any], Evaluator]] = {
+    list: _compile_list,
+    tuple: _compile_tuple,
+    set: _compile_set,
+    dict: _compile_dict,
+    str: _compile_str,
+}
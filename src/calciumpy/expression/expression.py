@@ -0,0 +1,22 @@
+import abc
+import typing
+
+if typing.TYPE_CHECKING:
+    from ..environment import Environment
+
+Evaluator = typing.Callable[["Environment"], typing.Any]
+
+
+class Expression(abc.ABC):
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def compile(self) -> Evaluator:
+        """Returns a closure that evaluates this expression
+        when called with the environment."""
+        pass
+
+    def evaluate(self, env: "Environment") -> typing.Any:
+        # commands hold the compiled closures,
+        # so this is only used out of the hot path
+        return self.compile()(env)
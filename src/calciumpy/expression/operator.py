@@ -1,65 +1,107 @@
+import operator
 import typing
 from ..environment import Environment
 from ..keyword import Keyword
 from ..error import OperatorNotSupportedError
+from .compiler import compile_expression, is_constant
+from .expression import Evaluator, Expression
 
 
-class BinaryOperator:
+def _contains(l: typing.Any, r: typing.Any) -> bool:
+    return l in r
+
+
+_binary_operators: dict[
+    Keyword, typing.Callable[[typing.Any, typing.Any], typing.Any]
+] = {
+    Keyword.ADD: operator.add,
+    Keyword.SUBTRACT: operator.sub,
+    Keyword.MULTIPLY: operator.mul,
+    Keyword.DIVIDE: operator.truediv,
+    Keyword.FLOOR_DIVIDE: operator.floordiv,
+    Keyword.MODULO: operator.mod,
+    Keyword.POWER: operator.pow,
+    Keyword.EQUAL: operator.eq,
+    Keyword.NOT_EQUAL: operator.ne,
+    Keyword.LESS_THAN: operator.lt,
+    Keyword.LESS_THAN_EQUAL: operator.le,
+    Keyword.GREATER_THAN: operator.gt,
+    Keyword.GREATER_THAN_EQUAL: operator.ge,
+    Keyword.IN: _contains,
+}
+
+_unary_operators: dict[Keyword, typing.Callable[[typing.Any], typing.Any]] = {
+    Keyword.NEGATIVE: operator.neg,
+    Keyword.NOT: operator.not_,
+}
+
+
+def _unsupported(op: Keyword) -> Evaluator:
+    # raised when evaluated, not when the program is loaded
+    def evaluate(env: Environment) -> typing.Any:
+        raise OperatorNotSupportedError(str(op))
+
+    return evaluate
+
+
+class BinaryOperator(Expression):
+    __slots__ = ("op", "left", "right")
+
     def __init__(self, op: Keyword, left: typing.Any, right: typing.Any):
         self.op = op
         self.left = left
         self.right = right
 
-    def evaluate(self, env: Environment) -> typing.Any:
-        l = env.evaluate(self.left)
-        r = env.evaluate(self.right)
-        if self.op == Keyword.ADD:
-            return l + r
-        if self.op == Keyword.SUBTRACT:
-            return l - r
-        if self.op == Keyword.MULTIPLY:
-            return l * r
-        if self.op == Keyword.DIVIDE:
-            return l / r
-        if self.op == Keyword.FLOOR_DIVIDE:
-            return l // r
-        if self.op == Keyword.MODULO:
-            return l % r
-        if self.op == Keyword.POWER:
-            return l**r
-
-        if self.op == Keyword.EQUAL:
-            return l == r
-        if self.op == Keyword.NOT_EQUAL:
-            return l != r
-        if self.op == Keyword.LESS_THAN:
-            return l < r
-        if self.op == Keyword.LESS_THAN_EQUAL:
-            return l <= r
-        if self.op == Keyword.GREATER_THAN:
-            return l > r
-        if self.op == Keyword.GREATER_THAN_EQUAL:
-            return l >= r
+    def compile(self) -> Evaluator:
+        left = compile_expression(self.left)
+        right = compile_expression(self.right)
 
+        # and, or evaluate the right operand only when needed
         if self.op == Keyword.AND:
-            return l and r
+
+            def evaluate_and(env: Environment) -> typing.Any:
+                return left(env) and right(env)
+
+            return evaluate_and
         if self.op == Keyword.OR:
-            return l or r
 
-        if self.op == Keyword.IN:
-            return l in r
-        raise OperatorNotSupportedError(str(self.op))
+            def evaluate_or(env: Environment) -> typing.Any:
+                return left(env) or right(env)
 
+            return evaluate_or
+
+        op = _binary_operators.get(self.op)
+        if op is None:
+            return _unsupported(self.op)
+
+        if is_constant(self.right):
+            constant = self.right
+
+            def evaluate_constant(env: Environment) -> typing.Any:
+                return op(left(env), constant)
+
+            return evaluate_constant
+
+        def evaluate(env: Environment) -> typing.Any:
+            return op(left(env), right(env))
+
+        return evaluate
+
+
+class UnaryOperator(Expression):
+    __slots__ = ("op", "operand")
 
-class UnaryOperator:
     def __init__(self, op: Keyword, operand: typing.Any) -> None:
         self.op = op
         self.operand = operand
 
-    def evaluate(self, env: Environment) -> typing.Any:
-        value = env.evaluate(self.operand)
-        if self.op == Keyword.NEGATIVE:
-            return -value
-        if self.op == Keyword.NOT:
-            return not value
-        raise OperatorNotSupportedError(str(self.op))
+    def compile(self) -> Evaluator:
+        operand = compile_expression(self.operand)
+        op = _unary_operators.get(self.op)
+        if op is None:
+            return _unsupported(self.op)
+
+        def evaluate(env: Environment) -> typing.Any:
+            return op(operand(env))
+
+        return evaluate
@@ -0,0 +1,66 @@
+from .element import Element, is_command
+from .index import Index
+from .keyword import Keyword
+
+
+class JumpTable:
+    """The control flow of the code computed when the code is loaded.
+
+    Elements which are not commands and comments are skipped,
+    so they never become the next line.
+    """
+
+    def __init__(self, code: list[list[Element]]):
+        size = len(code)
+        self.last_line = size - 1
+        # the same indent as the end of code supplied by the runtime
+        self.indents: list[int] = [1] * size
+        # the next command after each line
+        self.next_lines: list[int] = [self.last_line] * size
+        # the first command after each line whose indent is not deeper
+        self.block_ends: list[int] = [self.last_line] * size
+        # the command which has the block containing each line
+        self.headers: list[int] = [-1] * size
+
+        lines = [i for i, line in enumerate(code) if _is_flow_command(line)]
+        next_line = self.last_line
+        for i in range(size - 1, -1, -1):
+            self.next_lines[i] = next_line
+            if _is_flow_command(code[i]):
+                next_line = i
+
+        headers: list[int] = []
+        pending: list[int] = []
+        for i in lines:
+            indent: int = code[i][Index.INDENT]  # type: ignore
+            self.indents[i] = indent
+            while len(headers) > 0 and self.indents[headers[-1]] >= indent:
+                headers.pop()
+            if len(headers) > 0:
+                self.headers[i] = headers[-1]
+            headers.append(i)
+            while len(pending) > 0 and self.indents[pending[-1]] >= indent:
+                self.block_ends[pending.pop()] = i
+            pending.append(i)
+
+    def next_line(self, line: int, indent: int) -> int:
+        """Returns the first command after the line
+        whose indent is not deeper than the given one."""
+        next_line = self.next_lines[line]
+        if self.indents[next_line] <= indent:
+            return next_line
+        # skips the rest of the block which has not been entered
+        # or has been exited by break, continue and return
+        header = self.headers[next_line]
+        while header >= 0 and self.indents[header] > indent:
+            header = self.headers[header]
+        if header < 0:
+            return self.last_line
+        return self.block_ends[header]
+
+
+def _is_flow_command(element: Element) -> bool:
+    return (
+        is_command(element)
+        and element[Index.KEYWORD] != Keyword.COMMENT.value  # type: ignore
+    )
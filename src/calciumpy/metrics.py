@@ -0,0 +1,113 @@
+import typing
+import weakref
+
+if typing.TYPE_CHECKING:
+    from .runtime import Runtime
+
+
+class Counters:
+    """The counters of a runtime, updated by its environment."""
+
+    __slots__ = (
+        "steps",
+        "calls",
+        "callbacks",
+        "pauses",
+        "resumes",
+        "blocks_pushed",
+        "max_block_depth",
+        "max_call_depth",
+        "errors",
+    )
+
+    def __init__(self):
+        self.steps = 0
+        # the calls of the functions defined by the code,
+        # including the callbacks from library code
+        self.calls = 0
+        self.callbacks = 0
+        self.pauses = 0
+        self.resumes = 0
+        self.blocks_pushed = 0
+        self.max_block_depth = 0
+        self.max_call_depth = 0
+        # the number of the exceptions by their class names
+        self.errors: dict[str, int] = {}
+
+    def as_dict(self) -> dict[str, typing.Any]:
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        stats["errors"] = dict(self.errors)
+        return stats
+
+    def add(self, other: "Counters") -> None:
+        for name in _TOTALS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in ("max_block_depth", "max_call_depth"):
+            setattr(self, name, max(getattr(self, name), getattr(other, name)))
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+
+
+_TOTALS = ("steps", "calls", "callbacks", "pauses", "resumes", "blocks_pushed")
+
+_HELP = {
+    "steps": "Steps executed by the runtimes.",
+    "calls": "Calls of the functions defined by the code.",
+    "callbacks": "Calls from library code to the functions of the code.",
+    "pauses": "Pauses of the runtimes for input().",
+    "resumes": "Resumes of the runtimes after input().",
+    "blocks_pushed": "Blocks entered by the runtimes.",
+    "max_block_depth": "Largest number of nested blocks in a runtime.",
+    "max_call_depth": "Largest number of nested calls in a runtime.",
+}
+
+# the runtimes alive in this process
+_runtimes: "weakref.WeakSet[Runtime]" = weakref.WeakSet()
+# the counters of the runtimes already collected as garbage
+_retired = Counters()
+
+
+def register(runtime: "Runtime") -> None:
+    """Adds the runtime to the metrics of this process,
+    which is done by the runtime itself."""
+    _runtimes.add(runtime)
+    # the counters outlive the runtime to be added to the totals
+    weakref.finalize(runtime, _retired.add, runtime.env.counters)
+
+
+def collect() -> dict[str, typing.Any]:
+    """Returns the counters of all the runtimes of this process,
+    including the ones no longer alive."""
+    totals = Counters()
+    totals.add(_retired)
+    runtimes = list(_runtimes)
+    for runtime in runtimes:
+        totals.add(runtime.env.counters)
+    stats = totals.as_dict()
+    stats["runtimes"] = len(runtimes)
+    return stats
+
+
+def render(prefix: str = "calcium") -> str:
+    """Returns the counters of the runtimes in the Prometheus text
+    exposition format."""
+    stats = collect()
+    lines = [
+        f"# HELP {prefix}_runtimes Runtimes alive in this process.",
+        f"# TYPE {prefix}_runtimes gauge",
+        f"{prefix}_runtimes {stats['runtimes']}",
+    ]
+    for name, text in _HELP.items():
+        if name in _TOTALS:
+            metric, kind = f"{prefix}_{name}_total", "counter"
+        else:
+            metric, kind = f"{prefix}_{name}", "gauge"
+        lines.append(f"# HELP {metric} {text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {stats[name]}")
+    metric = f"{prefix}_errors_total"
+    lines.append(f"# HELP {metric} Exceptions raised by the code.")
+    lines.append(f"# TYPE {metric} counter")
+    for error, count in sorted(stats["errors"].items()):
+        lines.append(f'{metric}{{error="{error}"}} {count}')
+    return "\n".join(lines) + "\n"
@@ -1,8 +1,11 @@
+import builtins
 import typing
 from .error import NameNotFoundError
 
 
 class Namespace:
+    __slots__ = ("parent", "dictobj")
+
     def __init__(
         self,
         parent: typing.Union["Namespace", None],
@@ -15,13 +18,11 @@ class Namespace:
         self.dictobj[name] = value
 
     def lookup(self, name: str) -> typing.Any:
-        try:
+        if name in self.dictobj:
             return self.dictobj[name]
-        except KeyError:
-            if self.parent is None:
-                raise NameNotFoundError(name)
-            else:
-                return self.parent.lookup(name)
+        if self.parent is None:
+            raise NameNotFoundError(name)
+        return self.parent.lookup(name)
 
     def find_nesting_scope(self) -> "Namespace":
         scope: Namespace = self
@@ -31,25 +32,82 @@ class Namespace:
 
 
 class ClassScope(Namespace):
+    __slots__ = ()
+
     def create_attributes(self) -> dict[str, typing.Any]:
         return self.dictobj
 
 
+# the value of a local variable which has not been assigned yet
+UNBOUND = object()
+
+
 class FuncScope(Namespace):
-    pass
+    """The frame of a function call.
+
+    The local variables found when the code is loaded have fixed slots,
+    and the other names are kept in the dict.
+    """
+
+    __slots__ = ("layout", "slots")
+
+    def __init__(
+        self,
+        parent: typing.Union["Namespace", None],
+        dictobj: dict[str, typing.Any],
+        layout: typing.Optional[dict[str, int]] = None,
+        slots: typing.Optional[list[typing.Any]] = None,
+    ) -> None:
+        super().__init__(parent, dictobj)
+        self.layout: dict[str, int] = {} if layout is None else layout
+        self.slots: list[typing.Any] = [] if slots is None else slots
+
+    def define(self, name: str, value: typing.Any) -> None:
+        slot = self.layout.get(name)
+        if slot is None:
+            self.dictobj[name] = value
+        else:
+            self.slots[slot] = value
+
+    def lookup(self, name: str) -> typing.Any:
+        slot = self.layout.get(name)
+        if slot is not None:
+            value = self.slots[slot]
+            if value is not UNBOUND:
+                return value
+        elif name in self.dictobj:
+            return self.dictobj[name]
+        # not assigned yet or not a local variable
+        if self.parent is None:
+            raise NameNotFoundError(name)
+        return self.parent.lookup(name)
 
 
 class GlobalScope(Namespace):
+    """The global scope, which also resolves the builtins.
+
+    The builtins are bound into a table for each runtime, and the
+    globals are written through to it, so a global shadows a builtin
+    and every name is found by one lookup.
+    """
+
+    __slots__ = ("resolved",)
+
+    def __init__(
+        self,
+        parent: typing.Union["Namespace", None],
+        dictobj: dict[str, typing.Any],
+    ) -> None:
+        super().__init__(parent, dictobj)
+        self.resolved: dict[str, typing.Any] = dict(builtins.__dict__)
+        self.resolved.update(dictobj)
+
+    def define(self, name: str, value: typing.Any) -> None:
+        self.dictobj[name] = value
+        self.resolved[name] = value
+
     def lookup(self, name: str) -> typing.Any:
         try:
-            return super().lookup(name)
-        except:
-            try:
-                if isinstance(__builtins__, dict):
-                    return __builtins__[name]
-                else:
-                    return getattr(__builtins__, name)
-            except KeyError:
-                raise NameNotFoundError(name)
-            except:
-                raise
+            return self.resolved[name]
+        except KeyError:
+            raise NameNotFoundError(name) from None
@@ -2,6 +2,7 @@ import typing
 from .expression.assignable import (
     Assignable,
     Variable,
+    LocalVariable,
     Attribute,
     Subscript,
 )
@@ -16,21 +17,46 @@ from .command.ifs import Ifs, If, Elif, Else
 from .command.import_stmt import Import
 from .command.loop import For, While, Break, Continue
 from .command.pass_stmt import Comment, Pass, End
-from .element import Element
+from .element import Element, is_command, read_num
 from .index import Index
 from .keyword import Keyword
+from .resolver import Layout, Resolution
 
 
 class Parser:
     def __init__(self):
-        pass
+        # the local variables of the function containing the line
+        self.scope: typing.Optional[Layout] = None
+        # the local variables of the function defined by the line
+        self.layout: typing.Optional[Layout] = None
 
     def read(self, line: list[Element]) -> Command:
-        kwd: Keyword = Keyword(line[Index.KEYWORD])
+        kwd = _keyword(line[Index.KEYWORD])
         parser_func = _table[kwd]
         cmd = parser_func(self, line)
         return cmd
 
+    def read_code(
+        self, code: list[list[Element]]
+    ) -> tuple[typing.Optional[Command], ...]:
+        """Lowers the whole program into a table of commands indexed by line.
+
+        Elements that are not commands are kept as None
+        so that the table lines up with the code.
+        The local variables of functions are resolved to their slots.
+        """
+        resolution = Resolution(code)
+        commands: list[typing.Optional[Command]] = []
+        for i, line in enumerate(code):
+            if not is_command(line):
+                commands.append(None)
+                continue
+            self.scope = resolution.scopes[i]
+            self.layout = resolution.layouts.get(i)
+            commands.append(self.read(line))
+        self.scope, self.layout = None, None
+        return tuple(commands)
+
     def read_args(self, args_list: list[Element]) -> list[typing.Any]:
         args = []
         for elem in args_list:
@@ -44,13 +70,9 @@ class Parser:
             return obj
         # Some Calcium's expressions have the keyword
         # in the first element of a list
-        kwd = Keyword(obj[Index.EXPRESSION_KEYWORD])
+        kwd = _keyword(obj[Index.EXPRESSION_KEYWORD])
         if kwd == Keyword.NUM:
-            value: str = obj[Index.NUM_VALUE]
-            try:
-                return int(value, base=0)
-            except ValueError:
-                return float(value)
+            return read_num(obj[Index.NUM_VALUE])
 
         if kwd == Keyword.LIST:
             parsed_list = []
@@ -97,9 +119,11 @@ class Parser:
     def read_assignable(
         self, listobj: list[Element]
     ) -> typing.Union[Assignable, tuple]:
-        kwd = Keyword(listobj[Index.EXPRESSION_KEYWORD])
+        kwd = _keyword(listobj[Index.EXPRESSION_KEYWORD])
         if kwd == Keyword.VARIABLE:
             name: str = listobj[Index.VAR_NAME]  # type: ignore
+            if self.scope is not None and name in self.scope:
+                return LocalVariable(name, self.scope[name])
             return Variable(name)
         if kwd == Keyword.ATTRIBUTE:
             obj: typing.Union[Assignable, str] = self.read_expr(listobj[Index.ATTR_OBJECT])  # type: ignore
@@ -125,6 +149,17 @@ class Parser:
         raise ValueError("Invalid keyword for expression")
 
 
+_keywords = {kwd.value: kwd for kwd in Keyword}
+
+
+def _keyword(value: Element) -> Keyword:
+    # faster than calling Keyword(value)
+    try:
+        return _keywords[value]  # type: ignore
+    except KeyError:
+        raise ValueError(f"{value!r} is not a valid Keyword") from None
+
+
 _table: dict[Keyword, typing.Callable[[Parser, list[Element]], Command]] = {}
 
 
@@ -195,7 +230,7 @@ def _continue(parser: Parser, line: list[Element]) -> Command:
 def _def(parser: Parser, line: list[Element]) -> Command:
     name: str = line[Index.DEF_NAME]  # type: ignore
     args = parser.read_args(line[Index.DEF_PARAMETERS])  # type: ignore
-    return Def(name, args)
+    return Def(name, args, parser.layout)
 
 
 def _return(parser: Parser, line: list[Element]) -> Command:
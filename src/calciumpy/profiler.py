@@ -0,0 +1,432 @@
+import json
+import marshal
+import time
+import tracemalloc
+import types
+import typing
+
+from .command.command import Command
+from .command.function import UserFunction
+from .element import is_command
+from .environment import Environment, Execute, Hook
+from .index import Index
+from .keyword import Keyword
+
+if typing.TYPE_CHECKING:
+    from .runtime import Runtime
+
+# the line of the source of each command, made by the converter
+SourceMap = typing.Sequence[typing.Optional[int]]
+
+
+class LineProfiler:
+    """Counts the executions of each line of the code and the time
+    spent in them. The time of a line includes the functions called
+    back by library code, but not the functions it calls directly,
+    whose lines are counted by themselves.
+
+    The profiler wraps how the environment executes a command only
+    while it is enabled, so the runtime runs as fast as before when it
+    is disabled. The lines are the indexes of the commands, which
+    are mapped to the lines of the Python source by a source map of
+    the converter.
+    """
+
+    def __init__(self, runtime: "Runtime"):
+        self.runtime = runtime
+        size = len(runtime.env.code)
+        self.hits = [0] * size
+        self.times = [0.0] * size
+        self._hook: typing.Optional[Hook] = None
+
+    def enable(self) -> None:
+        if self._hook is not None:
+            return
+        hits = self.hits
+        times = self.times
+        clock = time.perf_counter
+
+        def hook(execute: Execute) -> Execute:
+            def execute_profiled(env: Environment, cmd: Command) -> None:
+                line = env.addr.line
+                if not env.activation:
+                    # not resumed after its callee returned
+                    hits[line] += 1
+                start = clock()
+                try:
+                    execute(env, cmd)
+                finally:
+                    times[line] += clock() - start
+
+            return execute_profiled
+
+        self._hook = hook
+        self.runtime.env.add_hook(hook)
+
+    def disable(self) -> None:
+        if self._hook is not None:
+            self.runtime.env.remove_hook(self._hook)
+            self._hook = None
+
+    def __enter__(self) -> "LineProfiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.disable()
+
+    def report(
+        self, source_map: typing.Optional[SourceMap] = None
+    ) -> list[dict[str, typing.Any]]:
+        """Returns the hits and the time in seconds of the executed
+        lines, which are the lines of the source with a source map."""
+        hits: dict[int, int] = {}
+        times: dict[int, float] = {}
+        for line, count in enumerate(self.hits):
+            if count == 0:
+                continue
+            if source_map is not None:
+                if source_map[line] is None:
+                    continue
+                key: int = source_map[line]  # type: ignore
+            else:
+                key = line
+            hits[key] = hits.get(key, 0) + count
+            times[key] = times.get(key, 0.0) + self.times[line]
+        return [
+            {"line": line, "hits": hits[line], "time": times[line]}
+            for line in sorted(hits)
+        ]
+
+    def dumps(self, source_map: typing.Optional[SourceMap] = None) -> str:
+        return json.dumps({"lines": self.report(source_map)})
+
+    def annotate(self, source: str, source_map: SourceMap) -> str:
+        """Returns the source with the hits and the milliseconds of
+        each line, to be read as a heat map."""
+        stats = {entry["line"]: entry for entry in self.report(source_map)}
+        lines = []
+        for number, text in enumerate(source.splitlines(), 1):
+            entry = stats.get(number)
+            if entry is None:
+                lines.append(f"{'':>8} {'':>10}  {text}")
+            else:
+                ms = entry["time"] * 1000
+                lines.append(f"{entry['hits']:>8} {ms:>10.3f}  {text}")
+        return "\n".join(lines)
+
+
+# (file, line, name) of a function as in pstats
+FunctionKey = tuple[str, int, str]
+
+
+class CallProfiler:
+    """Counts the calls of the functions defined by the code and the
+    time spent in them, in the format of cProfile.
+
+    The calls from the interpreter and from library code are both
+    counted. The built-in and library functions called by the code
+    are counted separately, with the time of the functions they call
+    back. The stats are read by `pstats.Stats(profiler)` or written by
+    `dump_stats()` for the tools reading the files of cProfile.
+    """
+
+    def __init__(
+        self,
+        runtime: "Runtime",
+        source_map: typing.Optional[SourceMap] = None,
+        filename: str = "<calcium>",
+    ):
+        self.runtime = runtime
+        self.source_map = source_map
+        self.filename = filename
+        self.stats: dict[FunctionKey, tuple] = {}
+        # [calls, primitive calls, own time, total time, callers]
+        self._entries: dict[typing.Any, list] = {}
+        # [key, start, time of the callees] of the running functions
+        self._stack: list[list] = []
+        # the number of the running calls of each function
+        self._running: dict[typing.Any, int] = {}
+        self._keys: dict[typing.Any, FunctionKey] = {}
+        self._clock = time.perf_counter
+
+    def enable(self) -> None:
+        self.runtime.env.call_profiler = self
+
+    def disable(self) -> None:
+        self.runtime.env.call_profiler = None
+        # the running calls are not counted
+        self._stack.clear()
+        self._running.clear()
+
+    def __enter__(self) -> "CallProfiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.disable()
+
+    def call(self, func: UserFunction) -> None:
+        # the functions made by the same def are counted as one
+        key = func.defn
+        if key not in self._keys:
+            line = func.line
+            if self.source_map is not None:
+                line = self.source_map[line] or 0
+            self._keys[key] = (self.filename, line, func.__name__)
+        self._push(key)
+
+    def returned(self) -> None:
+        if len(self._stack) == 0:
+            # called before the profiler was enabled
+            return
+        key, start, inner_time = self._stack.pop()
+        elapsed = self._clock() - start
+        running = self._running[key] - 1
+        self._running[key] = running
+        caller = self._stack[-1] if len(self._stack) > 0 else None
+        if caller is not None:
+            caller[2] += elapsed
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [0, 0, 0.0, 0.0, {}]
+        _add(entry, elapsed, inner_time, running == 0)
+        if caller is not None:
+            edges = entry[4]
+            edge = edges.get(caller[0])
+            if edge is None:
+                edge = edges[caller[0]] = [0, 0, 0.0, 0.0]
+            _add(edge, elapsed, inner_time, running == 0)
+
+    def call_host(
+        self,
+        funcobj: typing.Any,
+        args: list[typing.Any],
+        kwargs: dict[str, typing.Any],
+    ) -> typing.Any:
+        """Calls a function not defined by the code and counts it."""
+        if _is_defined(funcobj):
+            # counted by call() and returned()
+            return funcobj(*args, **kwargs)
+        key = _host_key(funcobj)
+        self._keys[key] = key
+        self._push(key)
+        try:
+            return funcobj(*args, **kwargs)
+        finally:
+            self.returned()
+
+    def create_stats(self) -> None:
+        """Makes `stats` in the format of cProfile."""
+        keys = self._keys
+        self.stats = {}
+        for key, (nc, cc, tt, ct, callers) in self._entries.items():
+            # (calls, primitive calls, own time, total time) by caller
+            edges = {keys[k]: tuple(edge) for k, edge in callers.items()}
+            self.stats[keys[key]] = (cc, nc, tt, ct, edges)
+
+    def dump_stats(self, path: str) -> None:
+        """Writes the stats to a file read by pstats."""
+        self.create_stats()
+        with open(path, "wb") as f:
+            marshal.dump(self.stats, f)
+
+    def _push(self, key: typing.Any) -> None:
+        self._running[key] = self._running.get(key, 0) + 1
+        self._stack.append([key, self._clock(), 0.0])
+
+
+def _add(
+    entry: list, elapsed: float, inner_time: float, is_primitive: bool
+) -> None:
+    entry[0] += 1
+    entry[2] += elapsed - inner_time
+    if is_primitive:
+        # the time of a recursive call is in the outermost call
+        entry[1] += 1
+        entry[3] += elapsed
+
+
+def _is_defined(funcobj: typing.Any) -> bool:
+    # called with keyword arguments
+    if type(funcobj) is UserFunction:
+        return True
+    if type(funcobj) is types.MethodType:
+        return type(funcobj.__func__) is UserFunction
+    if isinstance(funcobj, type):
+        return type(getattr(funcobj, "__init__", None)) is UserFunction
+    return False
+
+
+def _host_key(funcobj: typing.Any) -> FunctionKey:
+    code = getattr(funcobj, "__code__", None)
+    if code is not None:
+        return code.co_filename, code.co_firstlineno, code.co_name
+    name = getattr(funcobj, "__qualname__", None) or type(funcobj).__name__
+    return "~", 0, f"<built-in method {name}>"
+
+
+class MemoryProfiler:
+    """Measures the memory allocated by each line of the code with
+    tracemalloc, which is started while the profiler is enabled.
+
+    The net allocation of a line is the sum of the differences of the
+    traced memory around its executions, and the peak is the largest
+    growth of the traced memory during one of them. A line calling
+    back functions from library code includes their allocations.
+    The lines are attributed to the functions defining them.
+    """
+
+    def __init__(self, runtime: "Runtime"):
+        self.runtime = runtime
+        size = len(runtime.env.code)
+        self.hits = [0] * size
+        self.net = [0] * size
+        self.peak = [0] * size
+        # the net and the peak of the whole run since enabled
+        self.session_net = 0
+        self.session_peak = 0
+        self._start = 0
+        self._started_tracing = False
+        self._hook: typing.Optional[Hook] = None
+
+    def enable(self) -> None:
+        if self._hook is not None:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        hits = self.hits
+        net = self.net
+        peak = self.peak
+        get_traced_memory = tracemalloc.get_traced_memory
+        reset_peak = tracemalloc.reset_peak
+        # the peaks of the commands being executed, which are nested
+        # when library code calls back functions
+        peaks: list[int] = []
+
+        def hook(execute: Execute) -> Execute:
+            def execute_traced(env: Environment, cmd: Command) -> None:
+                line = env.addr.line
+                if not env.activation:
+                    hits[line] += 1
+                start, traced_peak = get_traced_memory()
+                if len(peaks) > 0:
+                    peaks[-1] = max(peaks[-1], traced_peak)
+                peaks.append(start)
+                reset_peak()
+                try:
+                    execute(env, cmd)
+                finally:
+                    current, traced_peak = get_traced_memory()
+                    command_peak = max(peaks.pop(), traced_peak)
+                    if len(peaks) > 0:
+                        peaks[-1] = max(peaks[-1], command_peak)
+                    net[line] += current - start
+                    peak[line] = max(peak[line], command_peak - start)
+                    self.session_net = current - self._start
+                    self.session_peak = max(
+                        self.session_peak, command_peak - self._start
+                    )
+
+            return execute_traced
+
+        self._start = get_traced_memory()[0] - self.session_net
+        self._hook = hook
+        self.runtime.env.add_hook(hook)
+
+    def disable(self) -> None:
+        if self._hook is None:
+            return
+        self.runtime.env.remove_hook(self._hook)
+        self._hook = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> "MemoryProfiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.disable()
+
+    def report(
+        self, source_map: typing.Optional[SourceMap] = None
+    ) -> list[dict[str, typing.Any]]:
+        """Returns the hits, the net and the peak in bytes of the
+        executed lines, which are the lines of the source with a
+        source map."""
+        stats: dict[int, dict[str, typing.Any]] = {}
+        functions = self._functions()
+        for line, count in enumerate(self.hits):
+            if count == 0:
+                continue
+            key = line if source_map is None else source_map[line]
+            if key is None:
+                continue
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = {
+                    "line": key,
+                    "function": functions[line],
+                    "hits": 0,
+                    "net": 0,
+                    "peak": 0,
+                }
+            entry["hits"] += count
+            entry["net"] += self.net[line]
+            entry["peak"] = max(entry["peak"], self.peak[line])
+        return [stats[key] for key in sorted(stats)]
+
+    def functions(self) -> list[dict[str, typing.Any]]:
+        """Returns the net and the peak of each function,
+        or <module> for the top level."""
+        stats: dict[str, dict[str, typing.Any]] = {}
+        for entry in self.report():
+            name = entry["function"]
+            if name not in stats:
+                stats[name] = {"function": name, "net": 0, "peak": 0}
+            stats[name]["net"] += entry["net"]
+            stats[name]["peak"] = max(stats[name]["peak"], entry["peak"])
+        return list(stats.values())
+
+    def dumps(self, source_map: typing.Optional[SourceMap] = None) -> str:
+        return json.dumps(
+            {
+                "session": {
+                    "net": self.session_net,
+                    "peak": self.session_peak,
+                },
+                "functions": self.functions(),
+                "lines": self.report(source_map),
+            }
+        )
+
+    def _functions(self) -> list[str]:
+        # the qualified name of the function or the class whose body
+        # has each line, as __qualname__
+        names = []
+        # (indent, name, prefix of the names defined in it) of the defs
+        # and the classes enclosing the line
+        enclosing: list[tuple[int, str, str]] = []
+        for line in self.runtime.env.code:
+            if not is_command(line):
+                names.append(enclosing[-1][1] if enclosing else "<module>")
+                continue
+            indent = line[Index.INDENT]
+            while len(enclosing) > 0 and enclosing[-1][0] >= indent:
+                enclosing.pop()
+            names.append(enclosing[-1][1] if enclosing else "<module>")
+            keyword = line[Index.KEYWORD]
+            if keyword in (Keyword.DEF.value, Keyword.CLASS.value):
+                name = line[Index.KEYWORD + 1]
+                if len(enclosing) > 0:
+                    name = enclosing[-1][2] + name
+                if keyword == Keyword.DEF.value:
+                    prefix = f"{name}.<locals>."
+                else:
+                    prefix = f"{name}."
+                enclosing.append((indent, name, prefix))
+        return names
@@ -0,0 +1,86 @@
+import typing
+from .element import Element, is_command
+from .index import Index
+from .keyword import Keyword
+
+# the slot index of each local variable of a function
+Layout = dict[str, int]
+
+_ASSIGNMENTS = (
+    Keyword.ASSIGN.value,
+    Keyword.COMPOUND_ADD.value,
+    Keyword.COMPOUND_SUBTRACT.value,
+    Keyword.COMPOUND_MULTIPLY.value,
+)
+
+
+class Resolution:
+    """The local variables of the functions found before parsing.
+
+    `scopes` has the layout of the function whose body directly
+    contains each line, or None for the lines of the global scope and
+    class bodies, where names are looked up dynamically.
+    `layouts` has the layout of each def line.
+    """
+
+    def __init__(self, code: list[list[Element]]):
+        self.scopes: list[typing.Optional[Layout]] = [None] * len(code)
+        self.layouts: dict[int, Layout] = {}
+
+        # (indent, layout) of def and class, layout is None for class
+        stack: list[tuple[int, typing.Optional[Layout]]] = []
+        for i, line in enumerate(code):
+            if not is_command(line):
+                continue
+            indent: int = line[Index.INDENT]  # type: ignore
+            while len(stack) > 0 and stack[-1][0] >= indent:
+                stack.pop()
+            scope = stack[-1][1] if len(stack) > 0 else None
+            self.scopes[i] = scope
+
+            kwd = line[Index.KEYWORD]
+            if scope is not None:
+                for name in _bound_names(line, kwd):
+                    _add(scope, name)
+            if kwd == Keyword.DEF.value:
+                layout: Layout = {}
+                for param in line[Index.DEF_PARAMETERS]:  # type: ignore
+                    _add(layout, param)  # type: ignore
+                self.layouts[i] = layout
+                stack.append((indent, layout))
+            elif kwd == Keyword.CLASS.value:
+                stack.append((indent, None))
+
+
+def _add(layout: Layout, name: str) -> None:
+    if name not in layout:
+        layout[name] = len(layout)
+
+
+def _bound_names(line: list[Element], kwd: Element) -> list[str]:
+    if kwd in _ASSIGNMENTS:
+        return _target_names(line[Index.ASSIGN_LEFT])
+    if kwd == Keyword.FOR.value:
+        return _target_names(line[Index.FOR_VARIABLES])
+    if kwd == Keyword.DEF.value:
+        return [line[Index.DEF_NAME]]  # type: ignore
+    if kwd == Keyword.CLASS.value:
+        return [line[Index.CLASS_NAME]]  # type: ignore
+    if kwd == Keyword.IMPORT.value:
+        path: str = line[Index.IMPORT_PATH]  # type: ignore
+        return [path.split(".")[0]]
+    return []
+
+
+def _target_names(target: Element) -> list[str]:
+    if not isinstance(target, list) or len(target) == 0:
+        return []
+    kwd = target[Index.EXPRESSION_KEYWORD]
+    if kwd == Keyword.VARIABLE.value:
+        return [target[Index.VAR_NAME]]  # type: ignore
+    if kwd == Keyword.COMMA.value:
+        names = []
+        for elem in target[Index.EXPRESSION_KEYWORD + 1 :]:
+            names.extend(_target_names(elem))
+        return names
+    return []
@@ -1,15 +1,17 @@
+import asyncio
 import enum
+import time
 import typing
 import json
 
-from .address import Address
+from . import bytecode, metrics
 from .command.command import Command
+from .command.ifs import Ifs
 from .command.pass_stmt import End
-from .element import Element
-from .environment import Environment
-from .index import Index
-from .keyword import Keyword
-from .label import FunctionCalled, InputCalled
+from .environment import MAX_DEPTH, Environment
+from .error import CallDepthExceededError
+from .executor import CLOCK_INTERVAL, fetch_command
+from .label import InputCalled
 from .parser import Parser
 
 
@@ -19,92 +21,211 @@ class RuntimeResult(enum.Enum):
     BREAKPOINT = 2
     EXCEPTION = 3
     PAUSED = 4
+    BUDGET_EXHAUSTED = 5
 
 
 class Runtime:
-    def __init__(self, code: typing.Union[str, list], decodes_str=False):
+    def __init__(
+        self,
+        code: typing.Union[str, bytes, list],
+        decodes_str=False,
+        max_depth=MAX_DEPTH,
+    ):
         commands: list
         if isinstance(code, str):
             commands = json.loads(code)
+        elif isinstance(code, bytes):
+            commands = bytecode.decode(code)
         else:
             commands = code
-        self.env = Environment(commands, decodes_str)
+        self.env = Environment(commands, decodes_str, max_depth)
         self.breakpoints = set()
         self.parser = Parser()
-        self._calls = []
+        # the program is parsed only once and the commands are reused
+        self.env.commands = self.parser.read_code(commands)
         self._inputcmd: typing.Optional[Command] = None
+        metrics.register(self)
 
     def resume(self, inputstr: str) -> RuntimeResult:
         """Resumes the runtime after an input() call."""
-        self.env.returned_value = inputstr
+        env = self.env
+        env.counters.resumes += 1
+        env.returned_value = inputstr
         cmd: Command = self._inputcmd  # type: ignore
         self._inputcmd = None
         try:
-            cmd.execute(self.env)
-            self.env.update_addr_to_next_command()
-        except FunctionCalled:
-            caller_addr = self.env.addr.clone()
-            self._calls.append(CallingCommand(caller_addr, cmd))
+            env.execute(env, cmd)
         except InputCalled:
             self._inputcmd = cmd
+            env.counters.pauses += 1
             return RuntimeResult.PAUSED
-        except:
+        except RecursionError:
+            # too many library calls calling back user functions
+            error = CallDepthExceededError(env.addr.calls)
+            self._count_error(error)
+            raise error from None
+        except Exception as e:
+            self._count_error(e)
+            raise
+        try:
+            env.update_addr_to_next_command()
+        except Exception as e:
+            self._count_error(e)
             raise
         return RuntimeResult.EXECUTED
 
+    def stats(self) -> dict[str, typing.Any]:
+        """Returns the counters of the runtime, which are also
+        collected by calciumpy.metrics for all the runtimes."""
+        return self.env.counters.as_dict()
+
+    def snapshot(self) -> bytes:
+        """Returns the state of the runtime,
+        which is restored by Runtime.restore()."""
+        from .snapshot import dumps
+
+        return dumps(self)
+
+    @staticmethod
+    def restore(data: bytes) -> "Runtime":
+        """Makes the runtime again from a snapshot. The objects made by
+        the code must be picklable, except the classes and functions
+        defined by the code and the imported modules."""
+        from .snapshot import loads
+
+        return loads(data)
+
     def run(self) -> RuntimeResult:
+        step = self.step
+        executed = RuntimeResult.EXECUTED
         while True:
-            result = self.step()
-            if result == RuntimeResult.EXECUTED:
+            result = step()
+            if result is not executed:
+                return result
+
+    def run_for(
+        self,
+        max_steps: typing.Optional[int] = None,
+        deadline: typing.Optional[float] = None,
+    ) -> RuntimeResult:
+        """Runs at most `max_steps` steps or until `deadline`,
+        a value of time.monotonic(), and returns BUDGET_EXHAUSTED
+        when the code has not stopped by itself.
+
+        The clock is checked once every 1024 steps. The steps of the
+        functions called by library code are counted as well, and as
+        such a call cannot be paused, BudgetExceededError is raised
+        when the budget runs out in it.
+        """
+        env = self.env
+        counters = env.counters
+        if max_steps is not None:
+            env.step_limit = counters.steps + max_steps
+        env.deadline = deadline
+        try:
+            while True:
+                count = CLOCK_INTERVAL
+                if env.step_limit is not None:
+                    count = min(count, env.step_limit - counters.steps)
+                    if count <= 0:
+                        return RuntimeResult.BUDGET_EXHAUSTED
+                result = self._run_steps(count)
+                if result is not RuntimeResult.BUDGET_EXHAUSTED:
+                    return result
+                if deadline is not None and time.monotonic() >= deadline:
+                    return RuntimeResult.BUDGET_EXHAUSTED
+        finally:
+            env.step_limit = None
+            env.deadline = None
+
+    def _run_steps(self, count: int) -> RuntimeResult:
+        """Runs about `count` steps without a hard budget, which may be
+        exceeded by a function called by library code."""
+        step = self.step
+        counters = self.env.counters
+        executed = RuntimeResult.EXECUTED
+        stop = counters.steps + count
+        while counters.steps < stop:
+            result = step()
+            if result is not executed:
+                return result
+        return RuntimeResult.BUDGET_EXHAUSTED
+
+    async def run_async(
+        self,
+        input_provider: typing.Optional[
+            typing.Callable[[str], typing.Awaitable[str]]
+        ] = None,
+        yield_every: int = 1000,
+    ) -> RuntimeResult:
+        """Runs the code on the event loop, yielding to it
+        once every `yield_every` steps.
+
+        input() awaits `input_provider` called with the prompt.
+        Without it, PAUSED is returned as run() does.
+        """
+        while True:
+            result = self._run_steps(yield_every)
+            if result is RuntimeResult.BUDGET_EXHAUSTED:
+                await asyncio.sleep(0)
                 continue
-            else:
+            while result is RuntimeResult.PAUSED:
+                if input_provider is None:
+                    return result
+                inputstr = await input_provider(self.env.prompt)
+                result = self.resume(inputstr)
+            if result is not RuntimeResult.EXECUTED:
                 return result
 
     def step(self) -> RuntimeResult:
-        last_index = len(self.env.code) - 1
-        if self.env.addr.indent == 0:
+        env = self.env
+        addr = env.addr
+        if addr.indent == 0:
             return RuntimeResult.TERMINATED
-        if self.env.addr.line >= last_index:
+        if addr.line >= env.jump_table.last_line:
             return RuntimeResult.TERMINATED
 
-        line = self.env._retrieve_next_line()
-        cmd = self.parser.read(line)
-
-        caller_addr = self.env.addr.clone()
-        if len(self._calls) > 0 and caller_addr.is_at(self._calls[-1].addr):
-            last_called_cmd = self._calls.pop()
-            cmd = last_called_cmd.cmd
-
+        cmd = fetch_command(env)
+        env.counters.steps += 1
         try:
-            cmd.execute(self.env)
-        except FunctionCalled:
-            self._calls.append(CallingCommand(caller_addr, cmd))
+            env.execute(env, cmd)
         except InputCalled:
             self._inputcmd = cmd
+            env.counters.pauses += 1
             return RuntimeResult.PAUSED
-        except:
+        except RecursionError:
+            # too many library calls calling back user functions
+            error = CallDepthExceededError(env.addr.calls)
+            self._count_error(error)
+            raise error from None
+        except Exception as e:
+            self._count_error(e)
             raise
 
-        if isinstance(cmd, End):
+        # the commands have no subclasses, so the types are compared
+        if type(cmd) is End:
             return RuntimeResult.TERMINATED
 
-        self.env.update_addr_to_next_command()
-        next_line = self.env._retrieve_next_line()
-        kwd = Keyword(next_line[Index.KEYWORD])
-        while kwd in (Keyword.COMMENT, Keyword.IFS):
-            cmd = self.parser.read(next_line)
-            cmd.execute(self.env)
-            self.env.update_addr_to_next_command()
-            next_line = self.env._retrieve_next_line()
-            kwd = Keyword(next_line[Index.KEYWORD])
-
-        if self.env.addr.line in self.breakpoints:
+        try:
+            env.update_addr_to_next_command()
+            # comments never become the next line
+            cmd = env.commands[env.addr.line]
+            while type(cmd) is Ifs:
+                cmd.execute(env)
+                env.update_addr_to_next_command()
+                cmd = env.commands[env.addr.line]
+        except Exception as e:
+            # raised by the conditions of the loops
+            self._count_error(e)
+            raise
+
+        if env.addr.line in self.breakpoints:
             return RuntimeResult.BREAKPOINT
 
         return RuntimeResult.EXECUTED
 
+    def _count_error(self, error: Exception) -> None:
+        errors = self.env.counters.errors
+        name = type(error).__name__
+        errors[name] = errors.get(name, 0) + 1
 
-class CallingCommand:
-    def __init__(self, addr: Address, cmd: Command):
-        self.addr = addr
-        self.cmd = cmd
@@ -0,0 +1,179 @@
+import collections
+import contextlib
+import heapq
+import io
+import typing
+
+from .runtime import Runtime, RuntimeResult
+
+# the pass of a session grows by this divided by its priority
+_STRIDE = 1 << 20
+
+
+class _Output(io.TextIOBase):
+    def __init__(self, chunks: typing.Deque[str]):
+        self.chunks = chunks
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        self.chunks.append(s)
+        return len(s)
+
+
+class Session:
+    """A runtime run by the scheduler with its own output and input.
+
+    The text printed by the code is appended to `output`, and the
+    texts in `inputs` are given to input() in order.
+    """
+
+    __slots__ = (
+        "runtime",
+        "priority",
+        "output",
+        "inputs",
+        "result",
+        "error",
+        "_stdout",
+        "_pass",
+        "_parked",
+    )
+
+    def __init__(self, runtime: Runtime, priority: int):
+        self.runtime = runtime
+        self.priority = priority
+        self.output: typing.Deque[str] = collections.deque()
+        self.inputs: typing.Deque[str] = collections.deque()
+        # the last result of the runtime
+        self.result = RuntimeResult.EXECUTED
+        self.error: typing.Optional[BaseException] = None
+        self._stdout = _Output(self.output)
+        self._pass = 0
+        self._parked = False
+
+    @property
+    def prompt(self) -> str:
+        return self.runtime.env.prompt
+
+    @property
+    def is_finished(self) -> bool:
+        return self.result in (
+            RuntimeResult.TERMINATED,
+            RuntimeResult.EXCEPTION,
+        )
+
+    def read(self) -> str:
+        """Returns the output printed since the last call."""
+        text = "".join(self.output)
+        self.output.clear()
+        return text
+
+
+class Scheduler:
+    """Runs many runtimes in one thread, a quantum of steps at a time.
+
+    The sessions get the quanta in proportion to their priorities by
+    stride scheduling. A session waiting for input or stopped at a
+    breakpoint is parked out of the run queue until `send()` or
+    `resume()` is called. The scheduler is not thread-safe.
+    """
+
+    def __init__(self, quantum: int = 1000):
+        self.quantum = quantum
+        self.sessions: set[Session] = set()
+        # (pass, order, session) of the runnable sessions
+        self._queue: list[tuple[int, int, Session]] = []
+        self._order = 0
+        self._pass = 0
+
+    def add(self, runtime: Runtime, priority: int = 1) -> Session:
+        """Adds the runtime with a priority from 1 to 1 << 20."""
+        # the stride of a session is _STRIDE // priority
+        if not 1 <= priority <= _STRIDE:
+            raise ValueError(f"priority {priority} is not in 1..{_STRIDE}")
+        session = Session(runtime, priority)
+        self.sessions.add(session)
+        self._wake(session)
+        return session
+
+    def remove(self, session: Session) -> None:
+        # a removed session left in the queue is skipped
+        self.sessions.discard(session)
+        session._parked = True
+
+    def send(self, session: Session, inputstr: str) -> None:
+        """Queues an input of the session, which wakes it if it is
+        waiting for input."""
+        session.inputs.append(inputstr)
+        if session not in self.sessions:
+            return
+        if session._parked and session.result == RuntimeResult.PAUSED:
+            self._wake(session)
+
+    def resume(self, session: Session) -> None:
+        """Continues the session stopped at a breakpoint."""
+        if session not in self.sessions:
+            return
+        if session._parked and session.result == RuntimeResult.BREAKPOINT:
+            session.result = RuntimeResult.EXECUTED
+            self._wake(session)
+
+    def run_once(self) -> typing.Optional[Session]:
+        """Runs one quantum of the session with the smallest pass,
+        and returns it, or None when no session is runnable."""
+        while len(self._queue) > 0:
+            _, _, session = heapq.heappop(self._queue)
+            if session in self.sessions and not session._parked:
+                break
+        else:
+            return None
+        self._pass = session._pass
+        session._pass += _STRIDE // session.priority
+
+        try:
+            with contextlib.redirect_stdout(session._stdout):
+                result = self._run(session)
+        except Exception as e:
+            session.error = e
+            result = RuntimeResult.EXCEPTION
+        session.result = result
+
+        if result in (RuntimeResult.EXECUTED, RuntimeResult.BUDGET_EXHAUSTED):
+            self._push(session)
+        elif result in (RuntimeResult.PAUSED, RuntimeResult.BREAKPOINT):
+            session._parked = True
+        else:
+            self.sessions.discard(session)
+        return session
+
+    def run(self) -> None:
+        """Runs the sessions until all of them are finished or parked."""
+        while self.run_once() is not None:
+            pass
+
+    def _run(self, session: Session) -> RuntimeResult:
+        runtime = session.runtime
+        if session.result == RuntimeResult.PAUSED:
+            result = runtime.resume(session.inputs.popleft())
+            if result != RuntimeResult.EXECUTED:
+                return result
+        # a quantum is not a hard budget, so the functions called by
+        # library code run to the end
+        result = runtime._run_steps(self.quantum)
+        while result == RuntimeResult.PAUSED and len(session.inputs) > 0:
+            result = runtime.resume(session.inputs.popleft())
+            if result == RuntimeResult.EXECUTED:
+                result = RuntimeResult.BUDGET_EXHAUSTED
+        return result
+
+    def _wake(self, session: Session) -> None:
+        session._parked = False
+        # a woken session has no credit for the time it was parked
+        session._pass = max(session._pass, self._pass)
+        self._push(session)
+
+    def _push(self, session: Session) -> None:
+        self._order += 1
+        heapq.heappush(self._queue, (session._pass, self._order, session))
@@ -0,0 +1,169 @@
+import importlib
+import io
+import pickle
+import types
+import typing
+
+from .command.class_stmt import Class
+from .expression.call import _CALLING, KeywordArgument
+from .expression.expression import Expression
+from .namespace import UNBOUND, GlobalScope
+
+if typing.TYPE_CHECKING:
+    from .runtime import Runtime
+
+# increased when the format is changed
+VERSION = 1
+
+# the attributes of the environment which are made again when restored
+_DERIVED = (
+    "code",
+    "commands",
+    "jump_table",
+    "execute",
+    "hooks",
+    "call_profiler",
+    "counters",
+)
+
+
+def dumps(runtime: "Runtime") -> bytes:
+    env = runtime.env
+    buffer = io.BytesIO()
+    header = (
+        VERSION,
+        env.code,
+        env.decodes_str,
+        env.max_depth,
+        runtime.breakpoints,
+    )
+    pickle.dump(header, buffer, pickle.HIGHEST_PROTOCOL)
+    state = {k: v for k, v in vars(env).items() if k not in _DERIVED}
+    _Pickler(buffer, runtime).dump((state, runtime._inputcmd))
+    return buffer.getvalue()
+
+
+def loads(data: bytes) -> "Runtime":
+    from .runtime import Runtime
+
+    buffer = io.BytesIO(data)
+    version, code, decodes_str, max_depth, breakpoints = pickle.load(buffer)
+    if version != VERSION:
+        raise ValueError(f"snapshot version {version} is not supported")
+    runtime = Runtime(code, decodes_str, max_depth)
+    runtime.breakpoints = breakpoints
+    state, inputcmd = _Unpickler(buffer, runtime).load()
+    vars(runtime.env).update(state)
+    runtime._inputcmd = inputcmd
+    return runtime
+
+
+def _parsed_objects(runtime: "Runtime") -> list[typing.Any]:
+    """Returns the commands and the expressions of the program in the
+    same order every time the code is parsed."""
+    objects: list[typing.Any] = []
+
+    def visit(obj: typing.Any) -> None:
+        if isinstance(obj, (list, tuple)):
+            for elem in obj:
+                visit(elem)
+        elif isinstance(obj, dict):
+            for key, value in obj.items():
+                visit(key)
+                visit(value)
+        elif isinstance(obj, (Expression, KeywordArgument)):
+            objects.append(obj)
+            visit_slots(obj)
+
+    def visit_slots(obj: typing.Any) -> None:
+        for klass in type(obj).__mro__:
+            for name in getattr(klass, "__slots__", ()):
+                # the compiled closures start with an underscore
+                if not name.startswith("_") and hasattr(obj, name):
+                    visit(getattr(obj, name))
+
+    for cmd in runtime.env.commands:
+        if cmd is not None:
+            objects.append(cmd)
+            visit_slots(cmd)
+    return objects
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles the state of a runtime.
+
+    The parsed program is referred to by the index of each object,
+    and the classes defined by the code are pickled by value.
+    """
+
+    def __init__(self, file: typing.IO[bytes], runtime: "Runtime"):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.env = runtime.env
+        self.indexes = {
+            id(obj): i for i, obj in enumerate(_parsed_objects(runtime))
+        }
+
+    def persistent_id(self, obj: typing.Any) -> typing.Any:
+        if obj is self.env:
+            return "env"
+        if obj is UNBOUND:
+            return "unbound"
+        if obj is _CALLING:
+            return "calling"
+        return self.indexes.get(id(obj))
+
+    def reducer_override(self, obj: typing.Any) -> typing.Any:
+        if isinstance(obj, types.ModuleType):
+            return importlib.import_module, (obj.__name__,)
+        if isinstance(obj, type) and obj.__module__ == Class.__module__:
+            # made by type() in a class statement
+            attributes = {
+                k: v
+                for k, v in vars(obj).items()
+                if k not in ("__dict__", "__weakref__")
+            }
+            return (
+                type,
+                (obj.__name__, obj.__bases__, {}),
+                attributes,
+                None,
+                None,
+                _set_attributes,
+            )
+        if type(obj) is GlobalScope:
+            # the builtins are bound again when restored
+            return (
+                GlobalScope,
+                (None, {}),
+                obj.dictobj,
+                None,
+                None,
+                _set_globals,
+            )
+        return NotImplemented
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file: typing.IO[bytes], runtime: "Runtime"):
+        super().__init__(file)
+        self.env = runtime.env
+        self.objects = _parsed_objects(runtime)
+
+    def persistent_load(self, pid: typing.Any) -> typing.Any:
+        if pid == "env":
+            return self.env
+        if pid == "unbound":
+            return UNBOUND
+        if pid == "calling":
+            return _CALLING
+        return self.objects[pid]
+
+
+def _set_attributes(obj: type, attributes: dict[str, typing.Any]) -> None:
+    for name, value in attributes.items():
+        setattr(obj, name, value)
+
+
+def _set_globals(scope: GlobalScope, dictobj: dict[str, typing.Any]) -> None:
+    for name, value in dictobj.items():
+        scope.define(name, value)
@@ -1,6 +1,14 @@
 import sys
+import argparse
 import ast
+import concurrent.futures
+import functools
+import glob
+import hashlib
+import io
 import json
+import os
+import tempfile
 import traceback
 import typing
 
@@ -38,16 +46,54 @@ KEYWORD_PASS = "pass"
 KEYWORD_RETURN = "return"
 KEYWORD_WHILE = "while"
 
+# the number of sources whose code is kept by convert_to_code()
+CACHE_SIZE = 256
+
+
+class ConversionError(Exception):
+    """Raised when the source cannot be converted to Calcium code.
+
+    `lineno` is the line of the source where it failed, if known.
+    """
+
+    def __init__(self, message: str, lineno: typing.Optional[int] = None):
+        if lineno is not None:
+            message = f"line {lineno}: {message}"
+        super().__init__(message)
+        self.lineno = lineno
+
+
+def _check_elements(elements: typing.Any) -> None:
+    if isinstance(elements, ast.AST):
+        name = type(elements).__name__
+        raise ConversionError(f"{name} is not supported here")
+    if isinstance(elements, (list, tuple)):
+        for elem in elements:
+            _check_elements(elem)
+    elif isinstance(elements, dict):
+        for key, value in elements.items():
+            _check_elements(key)
+            _check_elements(value)
+
 
 class CalciumVisitor(ast.NodeVisitor):
     def __init__(self, indent_spaces="    "):
         super().__init__()
         self.lines = []
         self.indents = []
+        # the line of the source of each command, or None
+        self.source_lines: list[typing.Optional[int]] = []
         self.keyword = KEYWORD_COMMENT
         self.count_of_nested_if = 0
         self.indent_spaces = indent_spaces
         self.indent_offset = len(indent_spaces)
+        # the line of the statement being converted
+        self.lineno: typing.Optional[int] = None
+
+    def visit(self, node):
+        if isinstance(node, ast.stmt):
+            self.lineno = node.lineno
+        return super().visit(node)
 
     def get_indent(self, node):
         return (
@@ -56,15 +102,20 @@ class CalciumVisitor(ast.NodeVisitor):
 
     def output_command(self, indent, keyword, elements=[]):
         self.indents.append(indent)
+        self.source_lines.append(self.lineno)
         comment = []
         line = [indent, comment, keyword]
         line.extend(elements)
-        self.lines.append(json.JSONEncoder(ensure_ascii=False).encode(line))
+        # the nodes not supported are left as they are
+        _check_elements(elements)
+        self.lines.append(line)
 
     def output_first_line(self):
+        self.lineno = None
         self.output_command(1, KEYWORD_COMMENT, [VERSION])
 
     def output_end_of_code(self):
+        self.lineno = None
         self.output_command(1, KEYWORD_END)
 
     def output_node(self, node, keyword, elements=[]):
@@ -86,17 +137,22 @@ class CalciumVisitor(ast.NodeVisitor):
             # eg.
             # else:
             #     if condition:
+            # the line of else is not known
+            self.lineno = None
             self.output_command(indent, KEYWORD_ELSE)
             for stmt in node.orelse:
                 self.visit(stmt)
         elif hasattr(node.orelse[0], "test"):
             self.output_elif(node.orelse[0], indent)
         else:
+            # the line of else is not known
+            self.lineno = None
             self.output_command(indent, KEYWORD_ELSE)
             for stmt in node.orelse:
                 self.visit(stmt)
 
     def output_elif(self, node, indent):
+        self.lineno = node.lineno
         # Should not call output_node()
         self.output_command(indent, KEYWORD_ELIF, [self.visit(node.test)])
         for stmt in node.body:
@@ -306,11 +362,14 @@ class CalciumVisitor(ast.NodeVisitor):
         return [KEYWORD_DICT, elems]
 
     def visit_Num(self, node):
-        return [KEYWORD_NUM, ast.unparse(node)]
+        return [KEYWORD_NUM, repr(node.value)]
 
     def visit_Constant(self, node):
+        if isinstance(node.value, bool):
+            return node.value
         if isinstance(node.value, int) or isinstance(node.value, float):
-            return [KEYWORD_NUM, ast.unparse(node)]
+            # the same as ast.unparse() for the numbers
+            return [KEYWORD_NUM, repr(node.value)]
         return node.value
 
     def visit_Str(self, node):
@@ -379,20 +438,333 @@ class CalciumVisitor(ast.NodeVisitor):
 
 def convert(src):
     try:
-        module_node = ast.parse(src)
-        visitor = CalciumVisitor()
-        visitor.visit(module_node)
-        lines = []
-        for indent, line in zip(visitor.indents, visitor.lines):
-            lines.append("{}{}".format("  " * indent, line))
-        code = (",\n").join(lines)
-        return "[\n{}\n]\n".format(code)
+        return format_code(convert_to_code(src))
     except Exception:
         return traceback.format_exc()
 
 
+def format_code(code: list[list]) -> str:
+    """Returns the JSON text of the code with a command on each line."""
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    lines = []
+    for line in code:
+        indent = line[0]
+        lines.append("{}{}".format("  " * indent, encoder.encode(line)))
+    return "[\n{}\n]\n".format((",\n").join(lines))
+
+
+def convert_to_code(src: str) -> list[list]:
+    """Converts the Python source to Calcium code as a list.
+
+    The code of recent sources is cached, so the returned list is
+    shared and should not be modified.
+    """
+    return _convert(src)[0]
+
+
+def source_map(src: str) -> list[typing.Optional[int]]:
+    """Returns the line of the source of each command converted from
+    it, or None for the commands made by the converter."""
+    return _convert(src)[1]
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _convert(src: str) -> tuple[list[list], list[typing.Optional[int]]]:
+    try:
+        module_node = ast.parse(src)
+    except SyntaxError as e:
+        raise ConversionError(str(e.msg), e.lineno) from e
+    visitor = CalciumVisitor()
+    try:
+        visitor.visit(module_node)
+    except Exception as e:
+        message = str(e) or type(e).__name__
+        raise ConversionError(message, visitor.lineno) from e
+    return visitor.lines, visitor.source_lines
+
+
+class IncrementalConverter:
+    """Converts the versions of a source being edited, parsing and
+    visiting only the top-level statements on the changed lines.
+
+    The commands of the other statements are kept from the last
+    version, which is enough because their indents depend only on the
+    columns in the statements. When the changed statements cannot be
+    parsed alone, the whole source is converted again. The returned
+    commands are shared between the versions and should not be
+    modified.
+    """
+
+    def __init__(self):
+        self._lines: list[str] = []
+        # (first line, last line + 1, commands) of each statement,
+        # where the lines are counted from 0
+        self._statements: list[tuple[int, int, list[list]]] = []
+
+    def convert(self, src: str) -> list[list]:
+        # split as the parser does, unlike str.splitlines()
+        lines = io.StringIO(src, newline="").readlines()
+        old_lines = self._lines
+        statements = self._statements
+
+        # the lines not changed at the start and at the end
+        count = min(len(lines), len(old_lines))
+        head = 0
+        while head < count and lines[head] == old_lines[head]:
+            head += 1
+        tail = 0
+        while tail < count - head and lines[-1 - tail] == old_lines[-1 - tail]:
+            tail += 1
+
+        # the statements on the changed lines are converted again
+        first = 0
+        while first < len(statements) and statements[first][1] <= head:
+            first += 1
+        last = first
+        while (
+            last < len(statements)
+            and statements[last][0] < len(old_lines) - tail
+        ):
+            last += 1
+        start = head
+        end = len(old_lines) - tail
+        if first < last:
+            start = min(start, statements[first][0])
+            end = max(end, statements[last - 1][1])
+        shift = len(lines) - len(old_lines)
+        try:
+            changed = self._convert_lines(lines, start, end + shift)
+        except SyntaxError:
+            # may be a part of a statement out of the range
+            first, last = 0, len(statements)
+            try:
+                changed = self._convert_lines(lines, 0, len(lines))
+            except SyntaxError as e:
+                raise ConversionError(str(e.msg), e.lineno) from e
+
+        self._lines = lines
+        self._statements = statements[:first] + changed
+        for line, end_line, commands in statements[last:]:
+            self._statements.append((line + shift, end_line + shift, commands))
+
+        code = [[1, [], KEYWORD_COMMENT, VERSION]]
+        for _, _, commands in self._statements:
+            code.extend(commands)
+        code.append([1, [], KEYWORD_END])
+        return code
+
+    def _convert_lines(
+        self, lines: list[str], start: int, end: int
+    ) -> list[tuple[int, int, list[list]]]:
+        module_node = ast.parse("".join(lines[start:end]))
+        ast.increment_lineno(module_node, start)
+        visitor = CalciumVisitor()
+        statements = []
+        for stmt in module_node.body:
+            visitor.lines = []
+            try:
+                visitor.visit(stmt)
+            except Exception as e:
+                message = str(e) or type(e).__name__
+                raise ConversionError(message, visitor.lineno) from e
+            # the decorators are on the lines before the statement
+            line = min(
+                [stmt.lineno]
+                + [d.lineno for d in getattr(stmt, "decorator_list", [])]
+            )
+            statements.append((line - 1, stmt.end_lineno, visitor.lines))
+        return statements
+
+
+# the file in the output directory which records the converted sources
+MANIFEST_NAME = ".calcium-manifest.json"
+
+
+def convert_files(
+    paths: typing.Iterable[str],
+    out_dir: typing.Optional[str] = None,
+    workers: typing.Optional[int] = None,
+) -> dict:
+    """Converts the Python files in the paths, which are files,
+    directories searched recursively or glob patterns, on a pool of
+    processes.
+
+    Each output is written next to its source, or under `out_dir` in
+    the same layout below the directory or the part of the pattern
+    without wildcards, with the suffix .json. A file whose source is
+    not changed since the last conversion by this version is skipped,
+    and the sources whose outputs would overwrite the output of
+    another are failed. Returns the summary of the conversion.
+    """
+    files = []
+    failed = []
+    # the source of each output
+    sources: dict[str, str] = {}
+    for source, output in _find_files(paths, out_dir):
+        key = os.path.abspath(output)
+        first = sources.get(key)
+        if first is None:
+            sources[key] = source
+            files.append((source, output))
+        elif os.path.abspath(first) != os.path.abspath(source):
+            error = f"{output} is also the output of {first}"
+            failed.append({"path": source, "line": None, "error": error})
+    if len(files) == 0:
+        return {"converted": 0, "unchanged": 0, "failed": failed}
+
+    if out_dir is not None:
+        root = out_dir
+    else:
+        # the manifest is put next to the outputs
+        root = os.path.commonpath([os.path.dirname(key) for key in sources])
+    manifest_path = os.path.join(root, MANIFEST_NAME)
+    # the hashes of the sources by their outputs relative to the root
+    manifest = _load_manifest(manifest_path)
+    tasks = []
+    skipped = 0
+    for source, output in files:
+        digest = manifest.get(os.path.relpath(output, root))
+        if digest is not None and _is_newer(output, source):
+            skipped += 1
+            continue
+        tasks.append((source, output, digest))
+
+    summary: dict = {"converted": 0, "unchanged": skipped, "failed": failed}
+    if len(tasks) > 0:
+        workers = workers or os.cpu_count() or 1
+        # the files are sent in chunks not to wait for each of them
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            results = executor.map(_convert_file, tasks, chunksize=chunksize)
+            for (source, output, _), (status, value) in zip(tasks, results):
+                key = os.path.relpath(output, root)
+                if status == "failed":
+                    manifest.pop(key, None)
+                    summary["failed"].append(dict(path=source, **value))
+                else:
+                    manifest[key] = value
+                    summary[status] += 1
+        _write_manifest(manifest_path, manifest)
+    return summary
+
+
+def _find_files(
+    paths: typing.Iterable[str], out_dir: typing.Optional[str]
+) -> typing.Iterator[tuple[str, str]]:
+    # yields the sources and their outputs
+    for path in paths:
+        if os.path.isdir(path):
+            pattern = os.path.join(path, "**", "*.py")
+            matches = glob.glob(pattern, recursive=True)
+            base = path
+        else:
+            matches = glob.glob(path, recursive=True)
+            # the directories before the first wildcard
+            base = os.path.dirname(path)
+            while glob.has_magic(base):
+                base = os.path.dirname(base)
+        for source in sorted(matches):
+            if not os.path.isfile(source):
+                continue
+            if out_dir is None:
+                output = source
+            else:
+                relpath = os.path.relpath(source, base or ".")
+                output = os.path.join(out_dir, relpath)
+            yield source, os.path.splitext(output)[0] + ".json"
+
+
+def _is_newer(output: str, source: str) -> bool:
+    try:
+        return os.path.getmtime(output) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def _convert_file(
+    task: tuple[str, str, typing.Optional[str]]
+) -> tuple[str, typing.Any]:
+    source, output, digest = task
+    try:
+        with open(source, "rb") as fin:
+            data = fin.read()
+        new_digest = hashlib.sha256(data).hexdigest()
+        if new_digest == digest and os.path.exists(output):
+            # only touched
+            os.utime(output)
+            return "unchanged", digest
+        text = format_code(convert_to_code(data.decode("utf-8")))
+        _write_atomically(output, text)
+        return "converted", new_digest
+    except ConversionError as e:
+        return "failed", {"line": e.lineno, "error": str(e)}
+    except Exception as e:
+        return "failed", {"line": None, "error": f"{type(e).__name__}: {e}"}
+
+
+def _load_manifest(path: str) -> dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as fin:
+            manifest = json.load(fin)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != VERSION:
+        # converted again by this version
+        return {}
+    return manifest["files"]
+
+
+def _write_manifest(path: str, files: dict[str, str]) -> None:
+    text = json.dumps({"version": VERSION, "files": files}, indent=1)
+    _write_atomically(path, text)
+
+
+def _write_atomically(path: str, text: str) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # written to another file first not to be read half-written
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def main(argv: typing.Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m calciumpy.tool.converter",
+        description="Converts Python files to Calcium code. With one file "
+        "and no options, the code is printed.",
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o", "--out-dir", help="the directory to write the outputs"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="the number of processes"
+    )
+    args = parser.parse_args(argv)
+
+    if (
+        len(args.paths) == 1
+        and os.path.isfile(args.paths[0])
+        and args.out_dir is None
+        and args.jobs is None
+    ):
+        with open(args.paths[0], encoding="utf-8") as fin:
+            print(convert(fin.read()))
+        return 0
+
+    summary = convert_files(args.paths, args.out_dir, args.jobs)
+    json.dump(summary, sys.stdout, ensure_ascii=False, indent=1)
+    print()
+    return 1 if len(summary["failed"]) > 0 else 0
+
+
 if __name__ == "__main__":
-    filename = sys.argv[1]
-    with open(filename, encoding="utf-8") as fin:
-        json_array = convert(fin.read())
-        print(json_array)
+    sys.exit(main())
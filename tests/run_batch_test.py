@@ -0,0 +1,86 @@
+import unittest
+import sys
+import time
+
+sys.path.append("../src")
+
+from calciumpy.batch import BatchExecutor, Job
+from calciumpy.runtime import RuntimeResult
+from calciumpy.tool.converter import convert_to_code
+
+
+def make_job(text, inputs=()):
+    return Job(convert_to_code(text), inputs)
+
+
+class TestBatch(unittest.TestCase):
+    def test_map(self):
+        jobs = [make_job(f"print({i} * input())\n", ["ab"]) for i in range(5)]
+        executor = BatchExecutor(workers=2, jobs_per_worker=2)
+        with executor:
+            results = executor.map(jobs)
+        self.assertEqual([r.index for r in results], list(range(5)))
+        for i, r in enumerate(results):
+            self.assertEqual(r.result, RuntimeResult.TERMINATED)
+            self.assertEqual(r.output, "ab" * i + "\n")
+
+    def test_reused_workers(self):
+        job = make_job("import os\nprint(os.getpid())\n")
+        with BatchExecutor(workers=2) as executor:
+            first = {r.output for r in executor.map([job] * 4)}
+            second = {r.output for r in executor.map([job] * 4)}
+        self.assertLessEqual(len(first), 2)
+        self.assertEqual(first | second, first)
+
+    def test_limits(self):
+        jobs = [
+            make_job("while 1:\n    pass\n"),
+            make_job("print(input())\n"),
+            make_job("print(x)\n"),
+        ]
+        executor = BatchExecutor(workers=1, max_steps=5000, cpu_time=5)
+        looping, waiting, failed = executor.map(jobs)
+        self.assertEqual(looping.result, RuntimeResult.BUDGET_EXHAUSTED)
+        self.assertEqual(waiting.result, RuntimeResult.PAUSED)
+        self.assertEqual(failed.result, RuntimeResult.EXCEPTION)
+        self.assertTrue(failed.error.startswith("NameNotFoundError"))
+
+    def test_cpu_time(self):
+        executor = BatchExecutor(workers=1, cpu_time=0.1)
+        (result,) = executor.map([make_job("while 1:\n    pass\n")])
+        self.assertEqual(result.result, RuntimeResult.BUDGET_EXHAUSTED)
+
+    def test_cpu_time_in_callback(self):
+        code = """def key(n):
+    while 1:
+        pass
+
+
+sorted([1, 2], key=key)
+"""
+        executor = BatchExecutor(workers=1, cpu_time=0.5)
+        start = time.monotonic()
+        (result,) = executor.map([make_job(code)])
+        self.assertEqual(result.result, RuntimeResult.BUDGET_EXHAUSTED)
+        self.assertLess(time.monotonic() - start, 3)
+
+    def test_stuck_step(self):
+        # a step never ends, so the worker is killed
+        executor = BatchExecutor(workers=1, cpu_time=0.2)
+        job = make_job("print(sum(range(10 ** 12)))\n")
+        start = time.monotonic()
+        stuck, after = executor.map([job, make_job("print(1)\n")])
+        self.assertEqual(stuck.result, RuntimeResult.BUDGET_EXHAUSTED)
+        self.assertEqual(after.output, "1\n")
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_memory(self):
+        executor = BatchExecutor(workers=1, memory=1 << 30)
+        job = make_job("s = 'a' * 2147483648\nprint(len(s))\n")
+        results = executor.map([job, make_job("print(1)\n")])
+        self.assertEqual(results[0].error, "MemoryError")
+        self.assertEqual(results[1].output, "1\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
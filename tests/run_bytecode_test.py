@@ -0,0 +1,55 @@
+import unittest
+from contextlib import redirect_stdout
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append("../src")
+
+from calciumpy import bytecode
+from calciumpy.runtime import Runtime
+from calciumpy.tool.converter import convert
+
+
+def run(code):
+    with io.StringIO() as out:
+        with redirect_stdout(out):
+            Runtime(code).run()
+        return out.getvalue()
+
+
+class TestBytecode(unittest.TestCase):
+    def test_cases(self):
+        for filename in os.listdir("test_cases"):
+            if not filename.endswith(".py"):
+                continue
+            with self.subTest(filename=filename):
+                with open(os.path.join("test_cases", filename)) as fin:
+                    json_text = convert(fin.read())
+                data = bytecode.encode(json.loads(json_text))
+                self.assertEqual(run(data), run(json_text))
+
+    def test_num(self):
+        code = json.loads(convert('print("num", "0x1f")\nprint(0x1f, 2.5)\n'))
+        data = bytecode.encode(code)
+        self.assertEqual(run(data), "num 0x1f\n31 2.5\n")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            bytecode.decode(b"[]")
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = bytecode.ConversionCache(directory)
+            source = "print(1 + 2)\n"
+            data = cache.load(source)
+            self.assertTrue(os.path.exists(cache.path(source)))
+            self.assertEqual(cache.load(source), data)
+            self.assertEqual(len(os.listdir(directory)), 1)
+            self.assertEqual(run(data), "3\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from contextlib import redirect_stdout
+import io
+import os
+import sys
+
+sys.path.append("../src")
+
+from calciumpy.compiler import Program
+from calciumpy.error import (
+    CallDepthExceededError,
+    OutOfRangeError,
+    NameNotFoundError,
+    ObjectNotIterableError,
+    ObjectNotCallableError,
+)
+from calciumpy.tool.converter import convert_to_code
+
+
+def compile_calcium(filepath):
+    with open(filepath) as fin:
+        return Program(convert_to_code(fin.read()))
+
+
+class TestCompiler(unittest.TestCase):
+    def test_cases(self):
+        for filename in os.listdir("test_cases"):
+            if not filename.endswith(".py"):
+                continue
+            filepath = os.path.join("test_cases", filename)
+            with self.subTest(filename=filename):
+                with io.StringIO() as raw_out, io.StringIO() as calcium_out:
+                    with redirect_stdout(raw_out):
+                        with open(filepath) as fin:
+                            exec(fin.read(), {})
+                    with redirect_stdout(calcium_out):
+                        compile_calcium(filepath).run()
+                    self.assertEqual(raw_out.getvalue(), calcium_out.getvalue())
+
+    def test_errors(self):
+        expected = {
+            "out_of_range.py": (OutOfRangeError, 2),
+            "name_not_found.py": (NameNotFoundError, 1),
+            "object_not_iterable.py": (ObjectNotIterableError, 2),
+            "object_not_callable.py": (ObjectNotCallableError, 2),
+            "call_depth_exceeded.py": (CallDepthExceededError, 2),
+        }
+        for filename, (error_type, line) in expected.items():
+            with self.subTest(filename=filename):
+                program = compile_calcium(os.path.join("test_errors", filename))
+                with self.assertRaises(error_type):
+                    with redirect_stdout(io.StringIO()):
+                        program.run()
+                self.assertEqual(program.line, line)
+
+    def test_type_error_in_call_line(self):
+        # raised by the operator, not by the call on the same line
+        code = convert_to_code('x = 1\nprint(x + "a")\n')
+        with self.assertRaises(TypeError) as cm:
+            Program(code).run()
+        self.assertNotIsInstance(cm.exception, ObjectNotCallableError)
+        with self.assertRaises(ObjectNotCallableError):
+            Program(convert_to_code("print(len(5))\n")).run()
+
+    def test_input(self):
+        code = convert_to_code("a = input()\nb = input('b: ')\nprint(a + b)")
+        with io.StringIO() as out:
+            with redirect_stdout(out):
+                Program(code).run(["1", "2"])
+            self.assertEqual(out.getvalue(), "12\n")
+        with self.assertRaises(EOFError):
+            Program(code).run(["1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
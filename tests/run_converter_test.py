@@ -0,0 +1,185 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append("../src")
+
+from calciumpy.tool.converter import (
+    ConversionError,
+    MANIFEST_NAME,
+    IncrementalConverter,
+    convert,
+    convert_files,
+    convert_to_code,
+)
+
+
+class TestConverter(unittest.TestCase):
+    def test_cases(self):
+        for filename in os.listdir("test_cases"):
+            if not filename.endswith(".py"):
+                continue
+            with self.subTest(filename=filename):
+                with open(os.path.join("test_cases", filename)) as fin:
+                    text = fin.read()
+                code = json.loads(convert(text))
+                self.assertEqual(convert_to_code(text), code)
+
+    def test_constants(self):
+        code = convert_to_code("a = [True, False, 3, 2.5, 1e400]\n")
+        elems = code[1][4][1]
+        self.assertEqual(
+            elems, [True, False, ["num", "3"], ["num", "2.5"], ["num", "inf"]]
+        )
+
+    def test_syntax_error(self):
+        with self.assertRaises(ConversionError) as cm:
+            convert_to_code("a = 1\nb = (\n")
+        self.assertEqual(cm.exception.lineno, 2)
+
+    def test_unsupported(self):
+        with self.assertRaises(ConversionError) as cm:
+            convert_to_code("a = 1\nb = f().name\n")
+        self.assertEqual(cm.exception.lineno, 2)
+
+    def test_node_left_in_code(self):
+        # the converter returned the nodes it does not support
+        with self.assertRaises(ConversionError) as cm:
+            convert_to_code("s = [1]\nprint(s[0].x)\n")
+        self.assertEqual(cm.exception.lineno, 2)
+
+    def test_cache(self):
+        text = "print('cached')\n"
+        self.assertIs(convert_to_code(text), convert_to_code(text))
+
+    def test_convert_error(self):
+        # convert() returns the traceback as before
+        self.assertIn("ConversionError", convert("b = (\n"))
+
+
+class TestIncrementalConverter(unittest.TestCase):
+    def test_cases(self):
+        converter = IncrementalConverter()
+        for filename in sorted(os.listdir("test_cases")):
+            if not filename.endswith(".py"):
+                continue
+            with self.subTest(filename=filename):
+                with open(os.path.join("test_cases", filename)) as fin:
+                    text = fin.read()
+                code = convert_to_code(text)
+                self.assertEqual(converter.convert(text), code)
+                # edited at the end
+                edited = converter.convert(text + "x = 1\n")
+                self.assertEqual(edited[:-2], code[:-1])
+
+    def test_edit(self):
+        converter = IncrementalConverter()
+        text = "def f(a):\n    return a\n\nb = 1; c = 2\nprint(f(b))\n"
+        code = converter.convert(text)
+        edited = converter.convert(text.replace("c = 2", "c = 3"))
+        self.assertEqual(edited, convert_to_code(text.replace("2", "3")))
+        # the function and print() are not converted again
+        self.assertIs(edited[1], code[1])
+        self.assertIs(edited[-2], code[-2])
+        self.assertIsNot(edited[4], code[4])
+
+    def test_error(self):
+        converter = IncrementalConverter()
+        converter.convert("a = 1\n")
+        with self.assertRaises(ConversionError) as cm:
+            converter.convert("a = 1\nb = f().name\n")
+        self.assertEqual(cm.exception.lineno, 2)
+        with self.assertRaises(ConversionError) as cm:
+            converter.convert("a = 1\nb = (\n")
+        self.assertEqual(cm.exception.lineno, 2)
+
+    def test_out_of_range(self):
+        converter = IncrementalConverter()
+        texts = [
+            "a = 1\n\nb = 2\n",
+            "a = 1\n(\nb\n)\n",
+            "a = 1\n'''\nb = 2\n'''\n",
+            "a = 1\nb = 2\n",
+            "a = 1\nif a:\n    b = 2\n",
+            "a = 1; b = 3\n",
+            "a = 1\n",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                code = convert_to_code(text)
+                self.assertEqual(converter.convert(text), code)
+
+
+class TestConvertFiles(unittest.TestCase):
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            src_dir = os.path.join(directory, "src")
+            out_dir = os.path.join(directory, "out")
+            os.makedirs(os.path.join(src_dir, "sub"))
+            sources = {"a.py": "print(1)\n", "sub/b.py": "b = (\n"}
+            for name, text in sources.items():
+                with open(os.path.join(src_dir, name), "w") as f:
+                    f.write(text)
+
+            summary = convert_files([src_dir], out_dir, workers=2)
+            self.assertEqual(summary["converted"], 1)
+            (failure,) = summary["failed"]
+            self.assertTrue(failure["path"].endswith("b.py"))
+            self.assertEqual(failure["line"], 1)
+            with open(os.path.join(out_dir, "a.json")) as f:
+                self.assertEqual(f.read(), convert("print(1)\n"))
+
+            summary = convert_files([src_dir], out_dir, workers=2)
+            self.assertEqual(summary["unchanged"], 1)
+            self.assertEqual(len(summary["failed"]), 1)
+
+            # touched but not changed
+            os.utime(os.path.join(src_dir, "a.py"), (0, 1 << 40))
+            summary = convert_files([src_dir], out_dir, workers=2)
+            self.assertEqual(summary["converted"], 0)
+            self.assertEqual(summary["unchanged"], 1)
+
+    def write_sources(self, directory, names):
+        for name in names:
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("print(1)\n")
+
+    def test_glob(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_sources(directory, ["bank/a/ex.py", "bank/b/ex.py"])
+            out_dir = os.path.join(directory, "out")
+            pattern = os.path.join(directory, "bank", "*", "ex.py")
+            summary = convert_files([pattern], out_dir)
+            self.assertEqual(summary["converted"], 2)
+            for name in ["a", "b"]:
+                path = os.path.join(out_dir, name, "ex.json")
+                self.assertTrue(os.path.exists(path))
+
+    def test_same_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_sources(directory, ["a/ex.py", "b/ex.py"])
+            out_dir = os.path.join(directory, "out")
+            paths = [os.path.join(directory, name) for name in ["a", "b"]]
+            summary = convert_files(paths, out_dir)
+            self.assertEqual(summary["converted"], 1)
+            (failure,) = summary["failed"]
+            self.assertEqual(failure["path"], os.path.join(paths[1], "ex.py"))
+
+    def test_manifest_next_to_outputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_sources(directory, ["src/a.py", "src/sub/b.py"])
+            src_dir = os.path.join(directory, "src")
+            summary = convert_files([src_dir])
+            self.assertEqual(summary["converted"], 2)
+            manifest = os.path.join(src_dir, MANIFEST_NAME)
+            self.assertTrue(os.path.exists(manifest))
+            summary = convert_files([src_dir])
+            self.assertEqual(summary["unchanged"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
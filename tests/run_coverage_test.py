@@ -0,0 +1,76 @@
+import unittest
+from contextlib import redirect_stdout
+import io
+import sys
+
+sys.path.append("../src")
+
+from calciumpy.coverage import Coverage
+from calciumpy.executor import execute_command
+from calciumpy.profiler import LineProfiler
+from calciumpy.runtime import Runtime
+from calciumpy.tool.converter import convert_to_code, source_map
+
+SOURCE = """def sign(n):
+    if n < 0:
+        return -1
+    elif n == 0:
+        return 0
+    return 1
+
+
+n = int(input())
+print(sign(n))
+print(list(map(sign, [n])))
+"""
+
+
+def run(inputstr):
+    runtime = Runtime(convert_to_code(SOURCE))
+    with Coverage.of(runtime) as coverage:
+        with redirect_stdout(io.StringIO()):
+            runtime.run()
+            runtime.resume(inputstr)
+            runtime.run()
+    # the runtime executes the commands as before
+    restored = runtime.env.execute is execute_command
+    return coverage, restored
+
+
+class TestCoverage(unittest.TestCase):
+    def test_lines(self):
+        coverage, restored = run("5")
+        self.assertTrue(restored)
+        lines = source_map(SOURCE)
+        self.assertEqual(coverage.executed(lines), [1, 2, 4, 6, 9, 10, 11])
+        self.assertEqual(coverage.missing(lines), [3, 5])
+
+    def test_merge(self):
+        coverage, _ = run("5")
+        for inputstr in ("0", "-5"):
+            other, _ = run(inputstr)
+            coverage.merge(bytes(other.lines))
+        self.assertEqual(coverage.missing(source_map(SOURCE)), [])
+        with self.assertRaises(ValueError):
+            coverage.merge(Coverage(1))
+
+    def test_with_profiler(self):
+        runtime = Runtime(convert_to_code(SOURCE))
+        profiler = LineProfiler(runtime)
+        profiler.enable()
+        coverage = Coverage.of(runtime)
+        # the hooks are not disabled in the order they were enabled
+        profiler.disable()
+        with redirect_stdout(io.StringIO()):
+            runtime.run()
+            runtime.resume("5")
+            runtime.run()
+        coverage.disable()
+        lines = source_map(SOURCE)
+        self.assertEqual(coverage.missing(lines), [3, 5])
+        self.assertEqual(sum(profiler.hits), 0)
+        self.assertIs(runtime.env.execute, execute_command)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import unittest
 sys.path.append("../src")
 
 from calciumpy.error import (
+    CallDepthExceededError,
     OutOfRangeError,
     NameNotFoundError,
     ObjectNotIterableError,
@@ -34,6 +35,11 @@ class TestErrors(unittest.TestCase):
             run_calcium("test_errors/object_not_callable.py")
         self.append_message(context)
 
+    def test_call_depth_exceeded(self):
+        with self.assertRaises(CallDepthExceededError) as context:
+            run_calcium("test_errors/call_depth_exceeded.py")
+        self.append_message(context)
+
     def append_message(self, context):
         TestErrors.message += str(context.exception) + "\n"
 
@@ -0,0 +1,201 @@
+import unittest
+from contextlib import redirect_stdout
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.append("../src")
+
+from calciumpy.executor import execute_command
+from calciumpy.profiler import CallProfiler, LineProfiler, MemoryProfiler
+from calciumpy.runtime import Runtime
+from calciumpy.tool.converter import convert_to_code, source_map
+
+SOURCE = """def twice(n):
+    return n * 2
+
+
+total = 0
+for i in range(5):
+    total += twice(i)
+print(list(map(twice, [1, 2])))
+"""
+
+
+def run(runtime):
+    with redirect_stdout(io.StringIO()):
+        return runtime.run()
+
+
+class TestLineProfiler(unittest.TestCase):
+    def test_hits(self):
+        runtime = Runtime(convert_to_code(SOURCE))
+        with LineProfiler(runtime) as profiler:
+            run(runtime)
+        self.assertIs(runtime.env.execute, execute_command)
+
+        report = profiler.report(source_map(SOURCE))
+        hits = {entry["line"]: entry["hits"] for entry in report}
+        # twice() is called back twice by map()
+        self.assertEqual(hits, {1: 1, 2: 7, 5: 1, 6: 1, 7: 5, 8: 1})
+        self.assertTrue(all(entry["time"] >= 0 for entry in report))
+        # the first line is the comment of the converter
+        self.assertEqual(json.loads(profiler.dumps())["lines"][0]["line"], 0)
+
+    def test_annotate(self):
+        runtime = Runtime(convert_to_code(SOURCE))
+        with LineProfiler(runtime) as profiler:
+            run(runtime)
+        lines = profiler.annotate(SOURCE, source_map(SOURCE)).splitlines()
+        self.assertEqual(len(lines), len(SOURCE.splitlines()))
+        self.assertEqual(lines[6].split()[0], "5")
+        self.assertTrue(lines[6].endswith("total += twice(i)"))
+
+    def test_disabled(self):
+        runtime = Runtime(convert_to_code(SOURCE))
+        profiler = LineProfiler(runtime)
+        run(runtime)
+        self.assertEqual(profiler.report(), [])
+
+
+CALLS = """def total(n):
+    if n == 0:
+        return 0
+    return n + total(n - 1)
+
+
+def key(s):
+    return len(s)
+
+
+print(total(10))
+print(sorted(["bb", "a"], key=key))
+print(key("abc"))
+"""
+
+
+class TestCallProfiler(unittest.TestCase):
+    def profile(self):
+        runtime = Runtime(convert_to_code(CALLS))
+        with CallProfiler(runtime, source_map(CALLS)) as profiler:
+            run(runtime)
+        self.assertIsNone(runtime.env.call_profiler)
+        return profiler
+
+    def test_stats(self):
+        profiler = self.profile()
+        profiler.create_stats()
+        stats = profiler.stats
+        # the recursive calls are not primitive
+        cc, nc, tt, ct, callers = stats[("<calcium>", 1, "total")]
+        self.assertEqual((cc, nc), (1, 11))
+        self.assertEqual(callers[("<calcium>", 1, "total")][:2], (10, 0))
+        self.assertGreaterEqual(ct, tt)
+        # called back by sorted() and called by the code
+        cc, nc, tt, ct, callers = stats[("<calcium>", 7, "key")]
+        self.assertEqual((cc, nc), (3, 3))
+        sorted_key = ("~", 0, "<built-in method sorted>")
+        self.assertEqual(callers[sorted_key][:2], (2, 2))
+        self.assertGreaterEqual(stats[sorted_key][3], ct * 2 / 3)
+        self.assertEqual(stats[("~", 0, "<built-in method len>")][1], 3)
+        self.assertEqual(stats[("~", 0, "<built-in method print>")][1], 3)
+
+    def test_pstats(self):
+        profiler = self.profile()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "calcium.prof")
+            profiler.dump_stats(path)
+            stats = pstats.Stats(path)
+        # total(), key(), sorted(), len() and print()
+        self.assertEqual(stats.total_calls, 11 + 3 + 1 + 3 + 3)
+        self.assertEqual(pstats.Stats(profiler).prim_calls, 1 + 3 + 1 + 3 + 3)
+
+
+MEMORY = """def grow(n):
+    xs = []
+    for i in range(n):
+        xs.append([0] * 1000)
+    return len(xs)
+
+
+big = []
+for i in range(100):
+    big.append([0] * 1000)
+big = None
+print(grow(100))
+"""
+
+
+class TestMemoryProfiler(unittest.TestCase):
+    def test_lines(self):
+        runtime = Runtime(convert_to_code(MEMORY))
+        with MemoryProfiler(runtime) as profiler:
+            run(runtime)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIs(runtime.env.execute, execute_command)
+
+        report = profiler.report(source_map(MEMORY))
+        lines = {entry["line"]: entry for entry in report}
+        self.assertEqual(lines[4]["function"], "grow")
+        self.assertEqual(lines[4]["hits"], 100)
+        self.assertGreater(lines[4]["net"], 800000)
+        self.assertGreater(lines[10]["net"], 800000)
+        self.assertLess(lines[10]["peak"], 100000)
+        # freed when the variable or the local scope is gone
+        self.assertLess(lines[11]["net"], -800000)
+        self.assertLess(lines[5]["net"], -800000)
+        self.assertGreater(profiler.session_peak, 800000)
+        self.assertLess(profiler.session_net, 100000)
+
+        functions = {f["function"]: f for f in profiler.functions()}
+        self.assertEqual(set(functions), {"<module>", "grow"})
+        dumped = json.loads(profiler.dumps())
+        self.assertEqual(dumped["session"]["peak"], profiler.session_peak)
+
+    def test_qualified_names(self):
+        text = """class A:
+    def __init__(self):
+        self.x = [0] * 10
+
+
+class B:
+    def __init__(self):
+        self.x = [1] * 10
+
+
+def f():
+    def g():
+        return [2] * 10
+
+    return g()
+
+
+a = A()
+b = B()
+c = f()
+"""
+        runtime = Runtime(convert_to_code(text))
+        with MemoryProfiler(runtime) as profiler:
+            run(runtime)
+        names = {f["function"] for f in profiler.functions()}
+        for name in ("A.__init__", "B.__init__", "f", "f.<locals>.g"):
+            self.assertIn(name, names)
+
+
+class TestSourceMap(unittest.TestCase):
+    def test_lines(self):
+        source = (
+            "a = 1\nif a:\n    b = 2\nelif a:\n    b = 3\nelse:\n    b = 4\n"
+        )
+        code = convert_to_code(source)
+        lines = source_map(source)
+        self.assertEqual(len(lines), len(code))
+        self.assertEqual(lines, [None, 1, 2, 2, 3, 4, 5, None, 7, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
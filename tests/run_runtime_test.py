@@ -0,0 +1,217 @@
+import asyncio
+import gc
+import unittest
+from contextlib import redirect_stdout
+import io
+import sys
+import time
+
+sys.path.append("../src")
+
+from calciumpy import metrics
+from calciumpy.error import BudgetExceededError, NameNotFoundError
+from calciumpy.runtime import Runtime, RuntimeResult
+from calciumpy.tool.converter import convert_to_code
+
+
+def make_runtime(text):
+    return Runtime(convert_to_code(text))
+
+
+class TestRunFor(unittest.TestCase):
+    def test_max_steps(self):
+        r = make_runtime("i = 0\nwhile 1:\n    i += 1\n")
+        self.assertEqual(r.run_for(max_steps=10), RuntimeResult.BUDGET_EXHAUSTED)
+        self.assertEqual(r.env.global_context.lookup("i"), 7)
+        self.assertEqual(r.run_for(max_steps=3000), RuntimeResult.BUDGET_EXHAUSTED)
+        self.assertEqual(r.env.global_context.lookup("i"), 3007)
+
+    def test_deadline(self):
+        r = make_runtime("while 1:\n    pass\n")
+        deadline = time.monotonic() + 0.05
+        self.assertEqual(r.run_for(deadline=deadline), RuntimeResult.BUDGET_EXHAUSTED)
+        self.assertGreaterEqual(time.monotonic(), deadline)
+
+    def test_terminated(self):
+        r = make_runtime("for i in range(3):\n    print(i)\n")
+        with io.StringIO() as out:
+            with redirect_stdout(out):
+                result = r.run_for(max_steps=100, deadline=time.monotonic() + 10)
+            self.assertEqual(result, RuntimeResult.TERMINATED)
+            self.assertEqual(out.getvalue(), "0\n1\n2\n")
+
+    def test_paused(self):
+        r = make_runtime("a = input()\nprint(a)\n")
+        self.assertEqual(r.run_for(max_steps=100), RuntimeResult.PAUSED)
+
+    callback = """def key(n):
+    while 1:
+        pass
+
+
+a = sorted([1, 2], key=key)
+"""
+
+    def test_max_steps_in_callback(self):
+        r = make_runtime(self.callback)
+        with self.assertRaises(BudgetExceededError):
+            r.run_for(max_steps=100)
+        self.assertLessEqual(r.stats()["steps"], 101)
+        self.assertEqual(r.stats()["errors"], {"BudgetExceededError": 1})
+
+    def test_deadline_in_callback(self):
+        r = make_runtime(self.callback)
+        start = time.monotonic()
+        with self.assertRaises(BudgetExceededError):
+            r.run_for(deadline=start + 0.05)
+        self.assertLess(time.monotonic() - start, 1)
+
+
+class TestRunAsync(unittest.TestCase):
+    def test_input_provider(self):
+        r = make_runtime("a = input('a: ')\nb = input('b: ')\nprint(a + b)\n")
+        prompts = []
+
+        async def provide(prompt):
+            prompts.append(prompt)
+            await asyncio.sleep(0)
+            return str(len(prompts))
+
+        with io.StringIO() as out:
+            with redirect_stdout(out):
+                result = asyncio.run(r.run_async(provide))
+            self.assertEqual(result, RuntimeResult.TERMINATED)
+            self.assertEqual(out.getvalue(), "12\n")
+        self.assertEqual(prompts, ["a: ", "b: "])
+
+    def test_yield(self):
+        r = make_runtime("i = 0\nwhile i < 1000:\n    i += 1\n")
+        ticks = []
+
+        async def count():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def main():
+            task = asyncio.create_task(count())
+            result = await r.run_async(yield_every=100)
+            task.cancel()
+            return result
+
+        self.assertEqual(asyncio.run(main()), RuntimeResult.TERMINATED)
+        self.assertGreaterEqual(len(ticks), 9)
+
+    def test_paused_without_provider(self):
+        r = make_runtime("a = input()\n")
+        self.assertEqual(asyncio.run(r.run_async()), RuntimeResult.PAUSED)
+
+
+class TestSnapshot(unittest.TestCase):
+    code = """import math
+
+
+class Point:
+    def __init__(self, x):
+        self.x = x
+
+    def twice(self):
+        return self.x * 2
+
+
+def ask(n):
+    total = 0
+    for i in range(n):
+        p = Point(i)
+        for c in ["a", "b"]:
+            if i > 0:
+                total += p.twice() + len(input(c))
+            else:
+                total += math.floor(1.5)
+    return total
+
+
+print(ask(3), ask(2))
+"""
+
+    def run_with_inputs(self, restores):
+        r = make_runtime(self.code)
+        with io.StringIO() as out:
+            with redirect_stdout(out):
+                result = r.run()
+                n = 0
+                while result == RuntimeResult.PAUSED:
+                    if restores:
+                        r = Runtime.restore(r.snapshot())
+                    n += 1
+                    result = r.resume("x" * n)
+                    if result == RuntimeResult.EXECUTED:
+                        result = r.run()
+            return out.getvalue()
+
+    def test_restore(self):
+        self.assertEqual(self.run_with_inputs(True), self.run_with_inputs(False))
+
+    def test_restore_globals(self):
+        r = make_runtime("a = [1]\nb = input()\nprint(a, b, len)\n")
+        self.assertEqual(r.run(), RuntimeResult.PAUSED)
+        r = Runtime.restore(r.snapshot())
+        with io.StringIO() as out:
+            with redirect_stdout(out):
+                r.resume("2")
+                r.run()
+            self.assertEqual(out.getvalue(), "[1] 2 <built-in function len>\n")
+
+
+class TestStats(unittest.TestCase):
+    code = """def depth(n):
+    if n == 0:
+        return 0
+    return depth(n - 1)
+
+
+def key(s):
+    return len(s)
+
+
+depth(3)
+words = sorted(["bb", "a"], key=key)
+a = input()
+print(undefined)
+"""
+
+    def test_stats(self):
+        r = make_runtime(self.code)
+        self.assertEqual(r.run(), RuntimeResult.PAUSED)
+        with self.assertRaises(NameNotFoundError):
+            r.resume("x")
+            r.run()
+        stats = r.stats()
+        self.assertEqual(stats["calls"], 4 + 2)
+        self.assertEqual(stats["callbacks"], 2)
+        self.assertEqual((stats["pauses"], stats["resumes"]), (1, 1))
+        self.assertEqual(stats["max_call_depth"], 4)
+        # the calls, and ifs and if in the last one
+        self.assertEqual(stats["max_block_depth"], 4 + 2)
+        self.assertGreaterEqual(stats["blocks_pushed"], stats["calls"])
+        self.assertEqual(stats["errors"], {"NameNotFoundError": 1})
+        self.assertGreater(stats["steps"], 10)
+
+    def test_metrics(self):
+        before = metrics.collect()
+        r = make_runtime("a = 1\n")
+        r.run()
+        steps = r.stats()["steps"]
+        del r
+        gc.collect()
+        after = metrics.collect()
+        # the counters are kept after the runtime is gone
+        self.assertEqual(after["steps"], before["steps"] + steps)
+        text = metrics.render()
+        self.assertIn("# TYPE calcium_steps_total counter\n", text)
+        self.assertIn(f"calcium_steps_total {after['steps']}\n", text)
+        self.assertIn("calcium_max_call_depth ", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+
+sys.path.append("../src")
+
+from calciumpy.error import NameNotFoundError
+from calciumpy.runtime import Runtime, RuntimeResult
+from calciumpy.scheduler import Scheduler
+from calciumpy.tool.converter import convert_to_code
+
+
+def make_runtime(text):
+    return Runtime(convert_to_code(text))
+
+
+class TestScheduler(unittest.TestCase):
+    def test_priority(self):
+        scheduler = Scheduler(quantum=100)
+        code = "i = 0\nwhile 1:\n    i += 1\n"
+        low = scheduler.add(make_runtime(code), priority=1)
+        high = scheduler.add(make_runtime(code), priority=3)
+        for _ in range(40):
+            scheduler.run_once()
+        low_count = low.runtime.env.global_context.lookup("i")
+        high_count = high.runtime.env.global_context.lookup("i")
+        self.assertAlmostEqual(high_count / low_count, 3, delta=0.3)
+
+    def test_invalid_priority(self):
+        scheduler = Scheduler()
+        for priority in (0, -1, (1 << 20) + 1):
+            with self.assertRaises(ValueError):
+                scheduler.add(make_runtime("a = 1\n"), priority=priority)
+        self.assertEqual(len(scheduler.sessions), 0)
+
+    def test_input(self):
+        scheduler = Scheduler()
+        session = scheduler.add(make_runtime("a = input()\nprint(a * 2)\n"))
+        scheduler.run()
+        self.assertEqual(session.result, RuntimeResult.PAUSED)
+        self.assertEqual(scheduler.run_once(), None)
+        scheduler.send(session, "ab")
+        scheduler.run()
+        self.assertEqual(session.result, RuntimeResult.TERMINATED)
+        self.assertEqual(session.read(), "abab\n")
+        self.assertEqual(len(scheduler.sessions), 0)
+
+    def test_queued_inputs(self):
+        scheduler = Scheduler()
+        session = scheduler.add(make_runtime("print(input() + input())\n"))
+        scheduler.send(session, "1")
+        scheduler.send(session, "2")
+        scheduler.run()
+        self.assertEqual(session.read(), "12\n")
+
+    def test_breakpoint(self):
+        scheduler = Scheduler()
+        runtime = make_runtime("print(1)\nprint(2)\n")
+        runtime.breakpoints.add(2)
+        session = scheduler.add(runtime)
+        scheduler.run()
+        self.assertEqual(session.result, RuntimeResult.BREAKPOINT)
+        self.assertEqual(session.read(), "1\n")
+        scheduler.resume(session)
+        scheduler.run()
+        self.assertEqual(session.read(), "2\n")
+        self.assertTrue(session.is_finished)
+
+    def test_error(self):
+        scheduler = Scheduler()
+        session = scheduler.add(make_runtime("print(x)\n"))
+        scheduler.run()
+        self.assertEqual(session.result, RuntimeResult.EXCEPTION)
+        self.assertIsInstance(session.error, NameNotFoundError)
+
+    def test_long_callback(self):
+        # a quantum ends after the function called by sorted() returns
+        scheduler = Scheduler(quantum=10)
+        code = """def key(n):
+    for i in range(100):
+        n += i
+    return -n
+
+
+print(sorted([1, 2], key=key))
+"""
+        session = scheduler.add(make_runtime(code))
+        scheduler.run()
+        self.assertEqual(session.result, RuntimeResult.TERMINATED)
+        self.assertEqual(session.read(), "[2, 1]\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,13 +4,12 @@ import io
 import os
 
 import sys
-import json
 import sys
 
 sys.path.append("../src")
 
 from calciumpy.runtime import Runtime
-from calciumpy.tool.converter import convert
+from calciumpy.tool.converter import convert_to_code
 
 dir_name = None
 file_names = None
@@ -23,8 +22,7 @@ else:
 def run_calcium(filepath):
     with open(filepath) as fin:
         text = fin.read()
-        json_text = convert(text)
-        code = json.loads(json_text)
+        code = convert_to_code(text)
         runtime = Runtime(code)
         runtime.run()
 
@@ -0,0 +1,15 @@
+def check(x):
+    print("check", x)
+    return x
+
+
+print(check(0) and check(1))
+print(check(1) or check(2))
+print(check(1) and check(0) or check(3))
+
+l = []
+if len(l) > 0 and l[0] == 1:
+    print("first")
+else:
+    print("empty")
+print(not l, -len(l), 2 in [1, 2])
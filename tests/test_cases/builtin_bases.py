@@ -0,0 +1,26 @@
+class MyInt(int):
+    def __init__(self, n):
+        self.doubled = n * 2
+
+
+class MyError(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class Pair(tuple):
+    def __init__(self, items):
+        self.first = items[0]
+
+
+i = MyInt(5)
+print(i + 1)
+print(i.doubled)
+
+e = MyError("boom")
+print(e.args)
+print(e.message)
+
+p = Pair([1, 2])
+print(len(p))
+print(p.first)
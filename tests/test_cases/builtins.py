@@ -0,0 +1,10 @@
+print(len("abc"), abs(-2))
+
+
+def len(x):
+    return 42
+
+
+print(len("abc"))
+abs = max
+print(abs(3, 9))
@@ -0,0 +1,46 @@
+def key(s):
+    return len(s)
+
+
+words = ["ccc", "a", "bb"]
+print(sorted(words, key=key))
+print(list(map(key, words)))
+
+
+def total(n):
+    if n == 0:
+        return 0
+    return n + total(n - 1)
+
+
+print(total(50))
+print(total(3) + total(4))
+
+
+def by_weight(s):
+    return weight(s)
+
+
+def weight(s):
+    return -len(s)
+
+
+def show(s):
+    print(s)
+
+
+print(sorted(words, key=by_weight))
+print(list(map(show, words)))
+
+
+class Box:
+    def __init__(self, value):
+        self.value = value
+
+    def size(self):
+        return weight(self.value)
+
+
+boxes = list(map(Box, words))
+for box in sorted(boxes, key=Box.size):
+    print(box.value, box.size())
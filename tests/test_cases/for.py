@@ -8,3 +8,21 @@ for i, elem in enumerate(l):
 s1, s2 = ["test", "jest"]
 for c1, c2 in zip(s1, s2):
     print(c1, c2)
+
+for i in range(10, 0, -3):
+    for j in range(i, 4):
+        print(i, j)
+    if i == 4:
+        continue
+    print(i)
+
+for i in range(3, 100, 5):
+    if i > 12:
+        break
+    print(i)
+print(i)
+
+k = 0
+for i in range(0):
+    k = 1
+print(k)
@@ -0,0 +1,45 @@
+def find(rows, target):
+    for i, row in enumerate(rows):
+        for j in row:
+            if j < 0:
+                continue
+            elif j == target:
+                return i
+            else:
+                if j > 100:
+                    break
+    return -1
+
+
+rows = [[1, -2, 3], [200, 5], [4, 5, 6]]
+print(find(rows, 5), find(rows, 3), find(rows, 7))
+
+n = 0
+while n < 10:
+    n += 1
+    if n % 2 == 0:
+        if n % 4 == 0:
+            continue
+        print("even", n)
+    elif n == 7:
+        break
+    else:
+        pass
+print("done", n)
+
+
+class Counter:
+    def __init__(self):
+        self.items = {}
+
+    def add(self, word):
+        if word in self.items:
+            self.items[word] += 1
+        else:
+            self.items[word] = 1
+
+
+c = Counter()
+for w in "a b a c b a".split():
+    c.add(w)
+print(sorted(c.items.items()))
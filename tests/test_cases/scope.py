@@ -0,0 +1,44 @@
+x = 10
+
+
+def outer(a):
+    y = a + x
+
+    def inner(b):
+        return b + y + x
+
+    z = inner(1)
+    return z
+
+
+print(outer(5))
+
+
+def shadow():
+    x = 3
+    for i in range(2):
+        x += i
+    return x
+
+
+print(shadow(), x)
+
+
+def swap(a, b):
+    a, b = b, a
+    return a - b
+
+
+print(swap(1, 5))
+
+
+class K:
+    y = x + 1
+
+    def get(self, n):
+        k = n * self.y
+        return k
+
+
+k = K()
+print(k.get(2))